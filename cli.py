@@ -3,21 +3,16 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import logging
 import sys
 import tempfile
 from pathlib import Path
 
-from git import Repo as GitRepo
-
-from kg_extractor.concept_extractor import ConceptExtractor
-from kg_extractor.course_builder import CourseBuilder
-from kg_extractor.expander import GraphExpander
-from kg_extractor.graph import KnowledgeGraph
-from kg_extractor.models import RepoAnalysis
-from kg_extractor.repo_analyzer import RepoAnalyzer
-from kg_extractor.scaffold import Scaffolder
+# Heavyweight imports (git, the LLM client, networkx) are deferred into the
+# cmd_* functions so short invocations like --help or analyze do not pay for
+# modules they never use.
 
 logger = logging.getLogger("kg_extractor")
 
@@ -34,6 +29,24 @@ def setup_logging(verbose: bool = False) -> None:
 def cmd_pipeline(args: argparse.Namespace) -> None:
     """Run the full pipeline: analyze → extract → expand → build courses → scaffold."""
     setup_logging(args.verbose)
+    asyncio.run(_pipeline_async(args))
+
+
+async def _pipeline_async(args: argparse.Namespace) -> None:
+    """Async pipeline body: CPU/disk work is scheduled alongside LLM latency.
+
+    The intermediate-analysis write overlaps Phase-2 extraction, and the
+    LLM-bound phases run through the async client paths so the event loop
+    stays free for concurrent work.
+    """
+    from git import Repo as GitRepo
+
+    from kg_extractor.concept_extractor import ConceptExtractor
+    from kg_extractor.course_builder import CourseBuilder
+    from kg_extractor.expander import GraphExpander
+    from kg_extractor.jsonio import dump_json
+    from kg_extractor.repo_analyzer import RepoAnalyzer
+    from kg_extractor.scaffold import Scaffolder
 
     repo_path = Path(args.repo)
 
@@ -41,15 +54,30 @@ def cmd_pipeline(args: argparse.Namespace) -> None:
     if args.repo.startswith("http://") or args.repo.startswith("https://"):
         clone_dir = Path(args.clone_dir) if args.clone_dir else Path(tempfile.mkdtemp(prefix="kg_"))
         if not (clone_dir / ".git").exists():
-            logger.info("Cloning %s to %s ...", args.repo, clone_dir)
-            GitRepo.clone_from(args.repo, str(clone_dir), depth=1)
-            # For commit history, do a partial unshallow
-            logger.info("Fetching commit history (last %d commits)...", args.max_commits)
+            logger.info("Cloning %s to %s (last %d commits)...", args.repo, clone_dir, args.max_commits)
+            # Single bounded clone: --depth gives the analyzer its commit
+            # history up front, and --filter=blob:none skips downloading
+            # historical blobs it only needs commit metadata for.  Trees are
+            # kept (no tree:0) so path-filtered git log stays local.
+            GitRepo.clone_from(
+                args.repo,
+                str(clone_dir),
+                multi_options=[
+                    f"--depth={args.max_commits}",
+                    "--filter=blob:none",
+                    "--no-checkout",
+                ],
+            )
+            # The analyzer only reads src/ and docs/; sparse-checkout keeps
+            # the rest of the working tree (and its blobs) off disk entirely.
             git_repo = GitRepo(clone_dir)
             try:
-                git_repo.git.fetch("--deepen", str(args.max_commits))
+                git_repo.git.sparse_checkout("init", "--cone")
+                git_repo.git.sparse_checkout("set", "src", "docs")
+                git_repo.git.checkout()
             except Exception as e:
-                logger.warning("Could not deepen clone: %s", e)
+                logger.warning("Sparse checkout failed, falling back to full checkout: %s", e)
+                git_repo.git.checkout()
         else:
             logger.info("Using existing clone at %s", clone_dir)
         repo_path = clone_dir
@@ -59,25 +87,29 @@ def cmd_pipeline(args: argparse.Namespace) -> None:
     # Phase 1: Repo analysis
     logger.info("=== Phase 1: Repo Analysis ===")
     analyzer = RepoAnalyzer(repo_path)
-    analysis = analyzer.analyze()
+    analysis = await asyncio.to_thread(analyzer.analyze)
 
-    # Save intermediate analysis
+    # Save intermediate analysis in the background while extraction runs
     analysis_path = output_dir / "knowledge" / "repo_analysis.json"
     analysis_path.parent.mkdir(parents=True, exist_ok=True)
-    analysis_path.write_text(json.dumps(analysis.to_dict(), indent=2) + "\n")
-    logger.info("Saved repo analysis to %s", analysis_path)
+    save_task = asyncio.create_task(
+        asyncio.to_thread(dump_json, analysis_path, analysis.to_dict())
+    )
 
     # Phase 2: Concept extraction
     logger.info("=== Phase 2: Concept Extraction ===")
     extractor = ConceptExtractor(model=args.model)
-    kg = extractor.extract(analysis)
+    kg = await extractor.extract_async(analysis)
     logger.info("Extracted %d concepts", len(kg.get_all_concepts()))
 
+    await save_task
+    logger.info("Saved repo analysis to %s", analysis_path)
+
     # Phase 3: Graph expansion
     if not args.skip_expansion:
         logger.info("=== Phase 3: Graph Expansion ===")
         expander = GraphExpander(model=args.model)
-        kg = expander.expand(kg, rounds=args.expansion_rounds)
+        kg = await expander.expand_async(kg, rounds=args.expansion_rounds)
         logger.info("Graph now has %d concepts after expansion", len(kg.get_all_concepts()))
     else:
         logger.info("=== Phase 3: Skipping graph expansion ===")
@@ -85,13 +117,13 @@ def cmd_pipeline(args: argparse.Namespace) -> None:
     # Phase 4: Course building
     logger.info("=== Phase 4: Course Building ===")
     builder = CourseBuilder(model=args.model)
-    courses = builder.build_courses(kg, generate_lessons=not args.skip_lessons)
+    courses = await builder.build_courses_async(kg, generate_lessons=not args.skip_lessons)
     logger.info("Built %d courses", len(courses))
 
     # Phase 5: Scaffold
     logger.info("=== Phase 5: Scaffolding Course Repo ===")
     scaffolder = Scaffolder(kg, courses, enable_blockchain=args.enable_blockchain)
-    scaffolder.scaffold(output_dir, repo_path=repo_path)
+    await asyncio.to_thread(scaffolder.scaffold, output_dir, repo_path=repo_path)
 
     # Initialize git repo if needed
     if not (output_dir / ".git").exists():
@@ -105,18 +137,26 @@ def cmd_pipeline(args: argparse.Namespace) -> None:
 def cmd_analyze(args: argparse.Namespace) -> None:
     """Run only the repo analysis phase."""
     setup_logging(args.verbose)
+
+    from kg_extractor.jsonio import dump_json
+    from kg_extractor.repo_analyzer import RepoAnalyzer
+
     analyzer = RepoAnalyzer(args.repo)
     analysis = analyzer.analyze()
 
     output = Path(args.output)
     output.parent.mkdir(parents=True, exist_ok=True)
-    output.write_text(json.dumps(analysis.to_dict(), indent=2) + "\n")
+    dump_json(output, analysis.to_dict())
     logger.info("Analysis saved to %s", output)
 
 
 def cmd_extract(args: argparse.Namespace) -> None:
     """Run concept extraction from an existing analysis file."""
     setup_logging(args.verbose)
+
+    from kg_extractor.concept_extractor import ConceptExtractor
+    from kg_extractor.models import RepoAnalysis
+
     analysis_data = json.loads(Path(args.analysis).read_text())
     analysis = RepoAnalysis.from_dict(analysis_data)
 
@@ -132,6 +172,11 @@ def cmd_extract(args: argparse.Namespace) -> None:
 def cmd_build(args: argparse.Namespace) -> None:
     """Build courses from an existing graph file."""
     setup_logging(args.verbose)
+
+    from kg_extractor.course_builder import CourseBuilder
+    from kg_extractor.graph import KnowledgeGraph
+    from kg_extractor.jsonio import dump_json
+
     kg = KnowledgeGraph.load(Path(args.graph))
 
     builder = CourseBuilder(model=args.model)
@@ -140,16 +185,20 @@ def cmd_build(args: argparse.Namespace) -> None:
     output = Path(args.output)
     output.parent.mkdir(parents=True, exist_ok=True)
     courses_data = [c.to_dict() for c in courses]
-    output.write_text(json.dumps(courses_data, indent=2, ensure_ascii=False) + "\n")
+    dump_json(output, courses_data)
     logger.info("Courses saved to %s (%d courses)", output, len(courses))
 
 
 def cmd_scaffold(args: argparse.Namespace) -> None:
     """Generate a course repo from existing graph and courses files."""
     setup_logging(args.verbose)
-    kg = KnowledgeGraph.load(Path(args.graph))
 
+    from kg_extractor.graph import KnowledgeGraph
     from kg_extractor.models import Course
+    from kg_extractor.scaffold import Scaffolder
+
+    kg = KnowledgeGraph.load(Path(args.graph))
+
     courses_data = json.loads(Path(args.courses).read_text())
     courses = [Course.from_dict(c) for c in courses_data]
 
@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Optional
 
 from kg_extractor.graph import KnowledgeGraph
-from kg_extractor.llm_client import get_client, chat_completion, parse_json_response
+from kg_extractor.llm_cache import LLMCache
+from kg_extractor.llm_client import (
+    JSON_RESPONSE_FORMAT,
+    chat_completion_async,
+    get_async_client,
+    get_client,
+    parse_json_response,
+)
 from kg_extractor.models import (
     ConceptNode, ConceptType, ConceptLevel, Edge, RelationshipType, RepoAnalysis,
 )
@@ -65,79 +73,199 @@ frontier concepts (latest models). Ensure proper prerequisite chains.
 Return ONLY valid JSON with keys "nodes" and "edges".\
 """
 
+# Valid enum values, so malformed LLM output can be gated with a set lookup
+# instead of exception-driven Enum construction.
+_VALID_TYPES = {t.value for t in ConceptType}
+_VALID_LEVELS = {l.value for l in ConceptLevel}
+_VALID_RELATIONSHIPS = {r.value for r in RelationshipType}
+
+# The system prompt only depends on the enums, so format it once at import
+# instead of on every extract call.
+_SYSTEM_PROMPT = EXTRACTION_SYSTEM_PROMPT.format(
+    types=", ".join(t.value for t in ConceptType),
+    levels=", ".join(l.value for l in ConceptLevel),
+    relationships=", ".join(r.value for r in RelationshipType),
+)
+
 
 class ConceptExtractor:
     """Uses an LLM to extract concepts from repo analysis data."""
 
-    def __init__(self, base_url: Optional[str] = None, model: str = "google/gemma-3-27b-it"):
+    def __init__(self, base_url: Optional[str] = None, model: str = "google/gemma-3-27b-it",
+                 num_shards: int = 4):
         self.client = get_client(base_url)
+        self.async_client = get_async_client(base_url)
         self.model = model
+        self.num_shards = num_shards
+        self.cache = LLMCache()
 
     def extract(self, analysis: RepoAnalysis) -> KnowledgeGraph:
         """Extract a knowledge graph from repo analysis."""
-        logger.info("Extracting concepts via LLM (model=%s)", self.model)
+        return asyncio.run(self.extract_async(analysis))
 
-        system_prompt = EXTRACTION_SYSTEM_PROMPT.format(
-            types=", ".join(t.value for t in ConceptType),
-            levels=", ".join(l.value for l in ConceptLevel),
-            relationships=", ".join(r.value for r in RelationshipType),
-        )
+    async def extract_async(self, analysis: RepoAnalysis) -> KnowledgeGraph:
+        """Extract a knowledge graph by sharding the analysis across concurrent LLM calls.
 
-        user_prompt = self._build_user_prompt(analysis)
+        One giant prompt is both latency-dominated and truncation-prone; instead
+        the models/commits/docs are split into shards dispatched concurrently so
+        vLLM's continuous batching overlaps them, and the results are merged by id.
+        """
+        logger.info("Extracting concepts via LLM (model=%s, shards=%d)", self.model, self.num_shards)
 
-        response_text = chat_completion(
-            self.client, self.model, system_prompt, user_prompt,
-            max_tokens=8192, temperature=0.3,
-        )
+        system_prompt = _SYSTEM_PROMPT
+
+        shards = self._shard_analysis(analysis, self.num_shards)
+        shard_results = await asyncio.gather(*[
+            self._extract_one_shard(system_prompt, self._build_user_prompt(shard))
+            for shard in shards
+        ])
 
-        graph_data = parse_json_response(response_text)
+        graph_data = self._merge_shard_results(list(shard_results))
         if not graph_data.get("nodes"):
-            logger.warning("No nodes in response, retrying with simpler prompt...")
-            graph_data = self._retry_extraction(system_prompt, analysis)
+            logger.warning("No nodes in response, retrying adaptively...")
+            graph_data = await self._retry_extraction(system_prompt, analysis)
 
         return self._build_graph(graph_data)
 
-    def _retry_extraction(self, system_prompt: str, analysis: RepoAnalysis) -> dict:
-        """Retry with a shorter prompt if the first attempt fails."""
-        short_prompt = (
-            "Extract 30-40 key transformer concepts from the HuggingFace Transformers repo. "
-            f"Models include: {', '.join(m['name'] for m in analysis.models[:30])}. "
-            "Return ONLY valid JSON with keys 'nodes' and 'edges'."
-        )
-        text = chat_completion(
-            self.client, self.model, system_prompt, short_prompt,
-            max_tokens=8192, temperature=0.3,
+    async def _extract_one_shard(self, system_prompt: str, user_prompt: str) -> dict:
+        """Run one shard's extraction call, short-circuiting on a cache hit."""
+        cache_key = LLMCache.key(self.model, system_prompt, user_prompt, 8192, 0.3)
+        data = self.cache.get(cache_key)
+        if data is None:
+            text = await chat_completion_async(
+                self.async_client, self.model, system_prompt, user_prompt,
+                max_tokens=8192, temperature=0.3,
+                response_format=JSON_RESPONSE_FORMAT,
+            )
+            data = parse_json_response(text)
+            self.cache.set(cache_key, data)
+        return data
+
+    def _shard_analysis(self, analysis: RepoAnalysis, num_shards: int) -> list[RepoAnalysis]:
+        """Split the analysis into shards by model group / commit epoch / doc cluster.
+
+        Shared components are small, so every shard gets the full list.
+        """
+        num_shards = max(1, num_shards)
+        if num_shards == 1:
+            return [analysis]
+
+        def chunk(items: list, k: int) -> list[list]:
+            if not items:
+                return [[] for _ in range(k)]
+            size = (len(items) + k - 1) // k
+            return [items[i * size:(i + 1) * size] for i in range(k)]
+
+        model_chunks = chunk(analysis.models, num_shards)
+        commit_chunks = chunk(analysis.key_commits, num_shards)
+        doc_chunks = chunk(analysis.doc_summaries, num_shards)
+
+        shards = []
+        for models, commits, docs in zip(model_chunks, commit_chunks, doc_chunks):
+            if not (models or commits or docs):
+                continue
+            shards.append(RepoAnalysis(
+                models=models,
+                components=analysis.components,
+                key_commits=commits,
+                doc_summaries=docs,
+            ))
+        return shards or [analysis]
+
+    @staticmethod
+    def _merge_shard_results(shard_results: list[dict]) -> dict:
+        """Merge per-shard extraction results, deduping nodes and edges.
+
+        Earlier shards win on node-id conflicts; edges are deduped by
+        (source, target, relationship).
+        """
+        nodes_by_id: dict[str, dict] = {}
+        edges: dict[tuple, dict] = {}
+        for result in shard_results:
+            for node in result.get("nodes", []):
+                node_id = node.get("id")
+                if node_id and node_id not in nodes_by_id:
+                    nodes_by_id[node_id] = node
+            for edge in result.get("edges", []):
+                key = (edge.get("source"), edge.get("target"), edge.get("relationship"))
+                if key not in edges:
+                    edges[key] = edge
+        return {"nodes": list(nodes_by_id.values()), "edges": list(edges.values())}
+
+    async def _retry_extraction(self, system_prompt: str, analysis: RepoAnalysis) -> dict:
+        """Adaptive retry: shrink the token budget and re-shard on each attempt.
+
+        A single bad response would otherwise push an empty graph through
+        every downstream phase. Each attempt lowers max_tokens (so the
+        response fits its budget), shards the analysis further, and nudges
+        temperature up to escape degenerate outputs. Stops as soon as enough
+        nodes come back.
+        """
+        min_nodes = 10
+        merged: dict = {}
+        temperature = 0.3
+        for max_tokens, shard_count in ((8192, 1), (4096, 2), (2048, 4)):
+            temperature += 0.1
+            logger.warning(
+                "Retrying extraction: shards=%d, max_tokens=%d, temperature=%.1f",
+                shard_count, max_tokens, temperature,
+            )
+            shards = self._shard_analysis(analysis, shard_count)
+            responses = await asyncio.gather(*[
+                chat_completion_async(
+                    self.async_client, self.model, system_prompt,
+                    self._build_user_prompt(shard),
+                    max_tokens=max_tokens, temperature=temperature,
+                    response_format=JSON_RESPONSE_FORMAT,
+                )
+                for shard in shards
+            ], return_exceptions=True)
+
+            shard_results = []
+            for response in responses:
+                if isinstance(response, Exception):
+                    logger.warning("Retry shard failed: %s", response)
+                else:
+                    shard_results.append(parse_json_response(response))
+
+            merged = self._merge_shard_results(shard_results)
+            if len(merged.get("nodes", [])) >= min_nodes:
+                return merged
+
+        logger.error(
+            "Extraction retries exhausted; continuing with %d node(s)",
+            len(merged.get("nodes", [])),
         )
-        return parse_json_response(text)
+        return merged
 
     def _build_user_prompt(self, analysis: RepoAnalysis) -> str:
+        # Build each section with a single join rather than repeated +=,
+        # which copies the accumulated string on every iteration.
         max_models = 50
-        models_text = ""
-        for m in analysis.models[:max_models]:
-            date_str = m.get("first_commit_date", "unknown")
-            classes = ", ".join(m.get("classes", [])[:5])
-            models_text += f"- **{m['name']}** (first commit: {date_str}): {classes}\n"
-
-        components_text = ""
-        for c in analysis.components:
-            if c.get("type") == "attention_variants":
-                components_text += (
-                    f"- {c['name']}: {c['count']} variants, "
-                    f"e.g. {', '.join(c.get('examples', [])[:5])}\n"
-                )
-            else:
-                components_text += f"- {c['name']} ({c.get('file', '')})\n"
+        models_text = "".join(
+            f"- **{m['name']}** (first commit: {m.get('first_commit_date', 'unknown')}): "
+            f"{', '.join(m.get('classes', [])[:5])}\n"
+            for m in analysis.models[:max_models]
+        )
+
+        components_text = "".join(
+            f"- {c['name']}: {c['count']} variants, e.g. {', '.join(c.get('examples', [])[:5])}\n"
+            if c.get("type") == "attention_variants"
+            else f"- {c['name']} ({c.get('file', '')})\n"
+            for c in analysis.components
+        )
 
         max_commits = 40
-        commits_text = ""
-        for c in analysis.key_commits[:max_commits]:
-            commits_text += f"- [{c['date']}] {c['message']} (keyword: {c['keyword']})\n"
+        commits_text = "".join(
+            f"- [{c['date']}] {c['message']} (keyword: {c['keyword']})\n"
+            for c in analysis.key_commits[:max_commits]
+        )
 
         max_docs = 40
-        docs_text = ""
-        for d in analysis.doc_summaries[:max_docs]:
-            summary = d.get("summary", "")[:200]
-            docs_text += f"- **{d['model']}**: {summary}\n"
+        docs_text = "".join(
+            f"- **{d['model']}**: {d.get('summary', '')[:200]}\n"
+            for d in analysis.doc_summaries[:max_docs]
+        )
 
         return EXTRACTION_USER_PROMPT.format(
             num_models=len(analysis.models),
@@ -158,14 +286,20 @@ class ConceptExtractor:
 
         for node_data in data.get("nodes", []):
             try:
+                type_value = node_data.get("type", "theory")
+                level_value = node_data.get("level", "intermediate")
                 node = ConceptNode(
                     id=node_data["id"],
                     name=node_data["name"],
-                    type=ConceptType(node_data.get("type", "theory")),
-                    level=ConceptLevel(node_data.get("level", "intermediate")),
+                    type=ConceptType(type_value) if type_value in _VALID_TYPES
+                    else ConceptType.THEORY,
+                    level=ConceptLevel(level_value) if level_value in _VALID_LEVELS
+                    else ConceptLevel.INTERMEDIATE,
                     description=node_data.get("description", ""),
-                    key_ideas=node_data.get("key_ideas", []),
-                    code_refs=node_data.get("code_refs", []),
+                    # Cap list fields so a malformed LLM response cannot
+                    # inflate every downstream lesson prompt.
+                    key_ideas=node_data.get("key_ideas", [])[:6],
+                    code_refs=node_data.get("code_refs", [])[:6],
                     paper_ref=node_data.get("paper_ref", ""),
                     first_appeared=node_data.get("first_appeared"),
                     confidence=node_data.get("confidence", 1.0),
@@ -174,18 +308,23 @@ class ConceptExtractor:
             except (KeyError, ValueError) as e:
                 logger.warning("Skipping invalid node %s: %s", node_data.get("id", "?"), e)
 
-        valid_ids = {n.id for n in kg.get_all_concepts()}
+        valid_ids = kg.ids()
         for edge_data in data.get("edges", []):
             try:
                 source = edge_data["source"]
                 target = edge_data["target"]
                 if source not in valid_ids or target not in valid_ids:
-                    logger.debug("Skipping edge %s->%s: missing node", source, target)
+                    # Per-edge hot path: skip even the lazy-format call
+                    # unless debug logging is actually on.
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Skipping edge %s->%s: missing node", source, target)
                     continue
+                rel_value = edge_data.get("relationship", "builds_on")
                 edge = Edge(
                     source=source,
                     target=target,
-                    relationship=RelationshipType(edge_data.get("relationship", "builds_on")),
+                    relationship=RelationshipType(rel_value) if rel_value in _VALID_RELATIONSHIPS
+                    else RelationshipType.BUILDS_ON,
                     description=edge_data.get("description", ""),
                 )
                 kg.add_edge(edge)
@@ -2,11 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import re
+from collections import defaultdict
 from typing import Optional
 
 from kg_extractor.graph import KnowledgeGraph
-from kg_extractor.llm_client import get_client, chat_completion, parse_json_response
+from kg_extractor.llm_cache import LLMCache
+from kg_extractor.llm_client import (
+    completion_batch_async,
+    get_async_client,
+    get_client,
+    parse_json_response,
+)
 from kg_extractor.models import (
     ConceptLevel, ConceptNode, Course, Lesson, RelationshipType,
 )
@@ -61,17 +70,17 @@ COURSE_CLUSTERS = [
     },
 ]
 
+# Number of lesson prompts sent per /v1/completions batch request
+LESSON_BATCH_SIZE = 32
+
+# The static rules come first and the per-concept fields last so every lesson
+# request shares a bit-identical prefix — vLLM's automatic prefix caching
+# (--enable-prefix-caching) can then reuse the KV cache for the shared
+# portion and skip most of the prefill per request.
 LESSON_GENERATION_PROMPT = """\
 You are writing ONE short lesson for an interactive transformer course delivered \
 inside Claude Code (a CLI chat — the learner cannot open files or run GUIs).
-
-## Concept
-Name: {concept_name}
-Paper: {paper_ref}
-Description: {concept_description}
-Key ideas: {key_ideas}
-Code references: {code_refs}
-Prerequisites: {prerequisites}
+The concept to teach is given at the end, after the rules.
 
 ## Rules for the "explanation" field (MUST be under 800 words)
 1. **Paper-first**: Open with the paper/origin — who wrote it, what year, what \
@@ -104,26 +113,47 @@ BAD (never use these):
 - "Open src/… and read …" — impossible in chat
 - "Run /exercise" — not a real command
 
-Return ONLY valid JSON with keys "explanation" and "exercise". No other text.\
+Return ONLY valid JSON with keys "explanation" and "exercise". No other text.
+
+## Concept
+Name: {concept_name}
+Paper: {paper_ref}
+Description: {concept_description}
+Key ideas: {key_ideas}
+Code references: {code_refs}
+Prerequisites: {prerequisites}\
 """
 
 
 class CourseBuilder:
     """Builds structured courses from the knowledge graph."""
 
-    def __init__(self, base_url: Optional[str] = None, model: str = "google/gemma-3-27b-it"):
+    def __init__(self, base_url: Optional[str] = None, model: str = "google/gemma-3-27b-it",
+                 max_concurrency: int = 64):
         self.client = get_client(base_url)
+        self.async_client = get_async_client(base_url)
         self.model = model
+        self.max_concurrency = max_concurrency
+        self.cache = LLMCache()
 
     def build_courses(self, kg: KnowledgeGraph, generate_lessons: bool = True) -> list[Course]:
         """Build courses from the knowledge graph."""
-        sorted_concepts = kg.topological_sort()
+        return asyncio.run(self.build_courses_async(kg, generate_lessons))
+
+    async def build_courses_async(self, kg: KnowledgeGraph, generate_lessons: bool = True) -> list[Course]:
+        """Async variant of build_courses, for callers already inside an event loop."""
+        # Clustering only needs a stable ordering; the topological sort
+        # matters for lesson order, so skip it when lessons are skipped.
+        if generate_lessons:
+            sorted_concepts = kg.topological_sort()
+        else:
+            sorted_concepts = list(kg.ids())
         courses = self._cluster_concepts(kg, sorted_concepts)
 
         if generate_lessons:
-            for course in courses:
-                logger.info("Generating lessons for course: %s", course.title)
-                course.lessons = self._generate_lessons(kg, course.concepts)
+            # Gather lessons for all courses in one event loop so vLLM sees
+            # the full request set and can form dense continuous batches.
+            await self._generate_all_lessons_async(kg, courses)
 
         courses = [c for c in courses if c.concepts]
 
@@ -133,55 +163,63 @@ class CourseBuilder:
         return courses
 
     def _cluster_concepts(self, kg: KnowledgeGraph, sorted_ids: list[str]) -> list[Course]:
-        assigned = set()
-        courses = []
-
-        for cluster in COURSE_CLUSTERS:
-            course = Course(
-                id=cluster["id"],
-                title=cluster["title"],
-                description=cluster.get("description", ""),
+        # One (cluster, course, compiled keyword pattern) triple per cluster,
+        # so classification is a single pass over the concepts instead of one
+        # full scan per cluster.
+        cluster_matchers = [
+            (
+                cluster,
+                Course(
+                    id=cluster["id"],
+                    title=cluster["title"],
+                    description=cluster.get("description", ""),
+                ),
+                re.compile("|".join(map(re.escape, cluster["keywords"])))
+                if cluster.get("keywords") else None,
             )
+            for cluster in COURSE_CLUSTERS
+        ]
+        courses = [course for _, course, _ in cluster_matchers]
 
-            for concept_id in sorted_ids:
-                if concept_id in assigned:
-                    continue
-                node = kg.get_concept(concept_id)
-                if not node:
-                    continue
-
-                if self._concept_matches_cluster(node, cluster):
+        assigned = set()
+        for concept_id in sorted_ids:
+            node = kg.get_concept(concept_id)
+            if not node:
+                continue
+            node_text = f"{node.id} {node.name} {node.description}".lower()
+            for cluster, course, pattern in cluster_matchers:
+                if self._concept_matches_cluster(node, cluster, node_text, pattern):
                     course.concepts.append(concept_id)
                     assigned.add(concept_id)
+                    break
 
-            courses.append(course)
-
+        courses_by_id = {c.id: c for c in courses}
         for concept_id in sorted_ids:
             if concept_id not in assigned:
                 node = kg.get_concept(concept_id)
                 if node:
-                    best_course = self._find_best_course(node, courses)
+                    best_course = self._find_best_course(node, courses_by_id, courses)
                     best_course.concepts.append(concept_id)
 
         return courses
 
-    def _concept_matches_cluster(self, node: ConceptNode, cluster: dict) -> bool:
+    def _concept_matches_cluster(self, node: ConceptNode, cluster: dict,
+                                 node_text: str, pattern: Optional[re.Pattern]) -> bool:
         levels = cluster.get("levels", [])
         if levels and node.level not in levels:
             return False
 
-        keywords = cluster.get("keywords", [])
-        if keywords:
-            node_text = f"{node.id} {node.name} {node.description}".lower()
-            return any(kw in node_text for kw in keywords)
+        if pattern is not None:
+            return pattern.search(node_text) is not None
 
         priority_types = cluster.get("priority_types", [])
         if priority_types:
-            return node.type.value in priority_types
+            return node.type in priority_types
 
         return bool(levels)
 
-    def _find_best_course(self, node: ConceptNode, courses: list[Course]) -> Course:
+    def _find_best_course(self, node: ConceptNode, courses_by_id: dict[str, Course],
+                          courses: list[Course]) -> Course:
         level_to_course = {
             ConceptLevel.FOUNDATIONAL: "foundations",
             ConceptLevel.INTERMEDIATE: "encoder_models",
@@ -189,71 +227,110 @@ class CourseBuilder:
             ConceptLevel.FRONTIER: "frontier",
         }
         target_id = level_to_course.get(node.level, "frontier")
+        return courses_by_id.get(target_id, courses[-1])
+
+    async def _generate_all_lessons_async(self, kg: KnowledgeGraph, courses: list[Course]) -> None:
+        """Generate lessons for every course via batched completion requests.
+
+        Prompts share one structure, so uncached ones are POSTed as list
+        prompts to /v1/completions in chunks of LESSON_BATCH_SIZE — one HTTP
+        round-trip per chunk, with chunks dispatched concurrently.
+        """
+        # Precompute lookup maps once instead of walking the graph per concept:
+        # per-concept get_prerequisites is O(E), so N concepts would be O(N*E).
+        by_id = {n.id: n for n in kg.get_all_concepts()}
+        prereq_ids: dict[str, list[str]] = defaultdict(list)
+        for edge in kg.get_all_edges():
+            if edge.relationship in (RelationshipType.REQUIRES, RelationshipType.BUILDS_ON):
+                prereq_ids[edge.target].append(edge.source)
+
+        # One (course, node, prompt) spec per concept, across all courses.
+        specs: list[tuple[Course, ConceptNode, str]] = []
         for course in courses:
-            if course.id == target_id:
-                return course
-        return courses[-1]
-
-    def _generate_lessons(self, kg: KnowledgeGraph, concept_ids: list[str]) -> list[Lesson]:
-        lessons = []
-        for concept_id in concept_ids:
-            node = kg.get_concept(concept_id)
-            if not node:
-                continue
-
-            prereqs = kg.get_prerequisites(concept_id)
-            prereq_names = []
-            for pid in prereqs:
-                pnode = kg.get_concept(pid)
-                if pnode:
-                    prereq_names.append(pnode.name)
+            logger.info("Generating lessons for course: %s", course.title)
+            for concept_id in course.concepts:
+                node = by_id.get(concept_id)
+                if not node:
+                    continue
+                prereq_names = [
+                    by_id[pid].name for pid in prereq_ids.get(concept_id, []) if pid in by_id
+                ]
+                specs.append((course, node, self._build_lesson_prompt(node, prereq_names)))
 
-            lesson = self._generate_one_lesson(node, prereq_names)
-            lessons.append(lesson)
+        lessons = await self._generate_lessons_batched(specs)
 
+        lessons_by_course: dict[str, list[Lesson]] = defaultdict(list)
+        for (course, _, _), lesson in zip(specs, lessons):
+            lessons_by_course[course.id].append(lesson)
+        for course in courses:
+            course.lessons = lessons_by_course.get(course.id, [])
+
+    async def _generate_lessons_batched(self, specs: list[tuple[Course, ConceptNode, str]]) -> list[Lesson]:
+        """Resolve lesson specs from cache, then batch the rest through the LLM."""
+        lessons: list[Optional[Lesson]] = [None] * len(specs)
+        pending: list[tuple[int, ConceptNode, str, str]] = []  # (index, node, prompt, cache_key)
+
+        for i, (_, node, prompt) in enumerate(specs):
+            cache_key = LLMCache.key(self.model, "", prompt, 6144, 0.3)
+            data = self.cache.get(cache_key)
+            if data is not None:
+                lessons[i] = self._lesson_from_data(node, data)
+            else:
+                pending.append((i, node, prompt, cache_key))
+
+        batches = [
+            pending[start:start + LESSON_BATCH_SIZE]
+            for start in range(0, len(pending), LESSON_BATCH_SIZE)
+        ]
+        # Bound in-flight batches so total concurrent prompts stay near
+        # max_concurrency.
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency // LESSON_BATCH_SIZE))
+        await asyncio.gather(*[
+            self._generate_one_batch(batch, lessons, semaphore) for batch in batches
+        ])
         return lessons
 
-    def _generate_one_lesson(self, node: ConceptNode, prerequisite_names: list[str]) -> Lesson:
-        fallback_exercise = (
-            f"True or false: {node.name} was introduced to solve a problem with "
-            "earlier approaches. Explain your answer in one sentence."
-        )
+    async def _generate_one_batch(self, batch: list[tuple[int, ConceptNode, str, str]],
+                                  lessons: list[Optional[Lesson]],
+                                  semaphore: asyncio.Semaphore) -> None:
+        prompts = [prompt for _, _, prompt, _ in batch]
+        try:
+            async with semaphore:
+                texts = await completion_batch_async(
+                    self.async_client, self.model, prompts,
+                    max_tokens=6144, temperature=0.3,
+                )
+        except Exception as e:
+            logger.warning("Lesson batch of %d failed: %s", len(batch), e)
+            texts = [""] * len(batch)
+
+        for (i, node, _, cache_key), text in zip(batch, texts):
+            data = parse_json_response(text) if text else {}
+            self.cache.set(cache_key, data)
+            lessons[i] = self._lesson_from_data(node, data)
 
-        prompt = LESSON_GENERATION_PROMPT.format(
+    def _build_lesson_prompt(self, node: ConceptNode, prerequisite_names: list[str]) -> str:
+        return LESSON_GENERATION_PROMPT.format(
             concept_name=node.name,
             paper_ref=node.paper_ref or "unknown",
             concept_description=node.description,
             key_ideas=", ".join(node.key_ideas) if node.key_ideas else "N/A",
             code_refs=", ".join(node.code_refs) if node.code_refs else "N/A",
-            prerequisites=", ".join(prerequisite_names) if prerequisite_names else "None",
+            prerequisites=", ".join(prerequisite_names[:8]) if prerequisite_names else "None",
         )
 
-        try:
-            text = chat_completion(
-                self.client, self.model, "", prompt,
-                max_tokens=6144, temperature=0.3,
-            )
-            data = parse_json_response(text)
-
-            return Lesson(
-                concept_id=node.id,
-                title=node.name,
-                prerequisites=[],
-                key_ideas=node.key_ideas,
-                code_ref=node.code_refs[0] if node.code_refs else "",
-                paper_ref=node.paper_ref,
-                exercise=data.get("exercise", fallback_exercise),
-                explanation=data.get("explanation", node.description),
-            )
-        except Exception as e:
-            logger.warning("Failed to generate lesson for %s: %s", node.id, e)
-            return Lesson(
-                concept_id=node.id,
-                title=node.name,
-                prerequisites=[],
-                key_ideas=node.key_ideas,
-                code_ref=node.code_refs[0] if node.code_refs else "",
-                paper_ref=node.paper_ref,
-                exercise=fallback_exercise,
-                explanation=node.description,
-            )
+    def _lesson_from_data(self, node: ConceptNode, data: dict) -> Lesson:
+        fallback_exercise = (
+            f"True or false: {node.name} was introduced to solve a problem with "
+            "earlier approaches. Explain your answer in one sentence."
+        )
+        return Lesson(
+            concept_id=node.id,
+            title=node.name,
+            prerequisites=[],
+            key_ideas=node.key_ideas,
+            code_ref=node.code_refs[0] if node.code_refs else "",
+            paper_ref=node.paper_ref,
+            exercise=data.get("exercise") or fallback_exercise,
+            explanation=data.get("explanation") or node.description,
+        )
@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 from typing import Optional
 
 from kg_extractor.graph import KnowledgeGraph
-from kg_extractor.llm_client import get_client, chat_completion, parse_json_response
+from kg_extractor.llm_client import (
+    JSON_RESPONSE_FORMAT,
+    chat_completion_async,
+    get_async_client,
+    get_client,
+    parse_json_response,
+)
 from kg_extractor.models import (
     ConceptNode, ConceptType, ConceptLevel, Edge, RelationshipType,
 )
@@ -39,8 +47,13 @@ For each new edge connecting new concepts to existing ones, provide:
 - relationship: one of {relationships}
 - description: brief description
 
-Return ONLY valid JSON with keys "new_nodes" and "new_edges". Only include truly new \
-concepts not already in the provided list. No other text.\
+Produce the concepts as successive "waves": concepts in a later wave should \
+extend from existing concepts or from earlier waves, like successive BFS \
+frontiers.
+
+Return ONLY valid JSON with key "waves": a list of objects, each with keys \
+"new_nodes" and "new_edges". Only include truly new concepts not already in \
+the provided list. No other text.\
 """
 
 EXPANSION_USER_PROMPT = """\
@@ -48,106 +61,202 @@ Here are the existing concepts in the knowledge graph:
 
 {existing_concepts}
 
-Identify {num_new} new cutting-edge concepts that extend from these, especially \
-focusing on frontier models and techniques from 2024-2025. Include proper edges \
-connecting them to existing concepts.
+Identify {num_waves} successive waves of {per_wave} new cutting-edge concepts \
+each, extending from the concepts above and from earlier waves, especially \
+focusing on frontier models and techniques from 2024-2025. Include proper \
+edges connecting each wave to existing concepts or earlier waves.
 
-Return ONLY valid JSON with keys "new_nodes" and "new_edges".\
+Return ONLY valid JSON with key "waves": a list of {{"new_nodes": [...], \
+"new_edges": [...]}} objects.\
 """
 
+# Valid enum values, so malformed LLM output is gated with a set lookup
+# instead of exception-driven Enum construction per item.
+_VALID_TYPES = {t.value for t in ConceptType}
+_VALID_LEVELS = {l.value for l in ConceptLevel}
+_VALID_RELATIONSHIPS = {r.value for r in RelationshipType}
+
+# Frozen at import so the system prompt stays byte-identical across every
+# call — a requirement for provider-side prompt/prefix caching to hit.
+_SYSTEM_PROMPT = EXPANSION_SYSTEM_PROMPT.format(
+    types=", ".join(t.value for t in ConceptType),
+    levels=", ".join(l.value for l in ConceptLevel),
+    relationships=", ".join(r.value for r in RelationshipType),
+)
+
 
 class GraphExpander:
     """Expands the knowledge graph to include frontier concepts via BFS."""
 
-    def __init__(self, base_url: Optional[str] = None, model: str = "google/gemma-3-27b-it"):
+    def __init__(self, base_url: Optional[str] = None, model: str = "google/gemma-3-27b-it",
+                 num_shards: int = 2):
         self.client = get_client(base_url)
+        self.async_client = get_async_client(base_url)
         self.model = model
+        self.num_shards = num_shards
 
     def expand(self, kg: KnowledgeGraph, rounds: int = 2, concepts_per_round: int = 10) -> KnowledgeGraph:
-        """Expand the graph through multiple BFS rounds."""
-        for round_num in range(1, rounds + 1):
-            logger.info("Expansion round %d/%d", round_num, rounds)
-            new_nodes, new_edges = self._expand_one_round(kg, concepts_per_round)
+        """Expand the graph with frontier concepts (sync wrapper)."""
+        return asyncio.run(self.expand_async(kg, rounds, concepts_per_round))
 
-            if not new_nodes:
-                logger.info("No new concepts found, stopping expansion")
-                break
+    async def expand_async(self, kg: KnowledgeGraph, rounds: int = 2,
+                           concepts_per_round: int = 10) -> KnowledgeGraph:
+        """Expand the graph with concurrent batched LLM calls.
 
-            for node in new_nodes:
-                kg.add_concept(node)
-            for edge in new_edges:
-                kg.add_edge(edge)
+        Each request asks for `rounds` successive waves of concepts instead
+        of issuing a round-trip per round — this amortizes the system prompt
+        and the full existing-concepts dump across rounds and removes
+        rounds-1 time-to-first-token waits. On top of that, the concept-type
+        space is partitioned into shards dispatched concurrently, so vLLM's
+        continuous batching schedules them into the same forward passes.
+        Waves are ingested in order, interleaved across shards, and deduped
+        against the graph so overlapping shard output is dropped.
+        """
+        type_shards = self._type_shards(self.num_shards)
+        per_shard = max(1, concepts_per_round // len(type_shards))
+        shard_waves = await asyncio.gather(*[
+            self._request_waves(kg, rounds, per_shard, focus_types=group)
+            for group in type_shards
+        ], return_exceptions=True)
 
+        for wave_num in range(rounds):
+            added_nodes = added_edges = 0
+            for waves in shard_waves:
+                if isinstance(waves, Exception):
+                    continue
+                if wave_num >= len(waves):
+                    continue
+                new_nodes, new_edges = self._ingest_wave(kg, waves[wave_num])
+                for node in new_nodes:
+                    kg.add_concept(node)
+                for edge in new_edges:
+                    kg.add_edge(edge)
+                added_nodes += len(new_nodes)
+                added_edges += len(new_edges)
+
+            if not added_nodes:
+                logger.info("No new concepts in wave %d, stopping expansion", wave_num + 1)
+                break
             logger.info(
-                "Round %d: added %d concepts, %d edges",
-                round_num, len(new_nodes), len(new_edges),
+                "Wave %d: added %d concepts, %d edges",
+                wave_num + 1, added_nodes, added_edges,
             )
 
+        failures = [w for w in shard_waves if isinstance(w, Exception)]
+        for failure in failures:
+            logger.warning("Expansion shard failed: %s", failure)
+
         return kg
 
-    def _expand_one_round(self, kg: KnowledgeGraph, num_new: int) -> tuple[list[ConceptNode], list[Edge]]:
-        """Run one round of expansion."""
-        system_prompt = EXPANSION_SYSTEM_PROMPT.format(
-            types=", ".join(t.value for t in ConceptType),
-            levels=", ".join(l.value for l in ConceptLevel),
-            relationships=", ".join(r.value for r in RelationshipType),
-        )
+    @staticmethod
+    def _type_shards(num_shards: int) -> list[list[ConceptType]]:
+        """Partition the concept types into contiguous shard groups."""
+        types = list(ConceptType)
+        num_shards = max(1, min(num_shards, len(types)))
+        size = (len(types) + num_shards - 1) // num_shards
+        return [types[i * size:(i + 1) * size] for i in range(num_shards)]
 
-        existing = "\n".join(
-            f"- {n.id}: {n.name} ({n.type.value}, {n.level.value}) — {n.description[:100]}"
-            for n in kg.get_all_concepts()
+    async def _request_waves(self, kg: KnowledgeGraph, num_waves: int, per_wave: int,
+                             focus_types: Optional[list[ConceptType]] = None) -> list[dict]:
+        """Request all expansion waves for one type shard in a single LLM call."""
+        # Concepts render in a deterministic order (sorted by id) so repeat
+        # calls present byte-identical prompts to the server's prefix cache,
+        # and each line comes pre-rendered from the graph — built once when
+        # the concept was added, not re-formatted per round.
+        # Long-lived foundational/intermediate concepts form a frozen block
+        # up front; advanced/frontier concepts — the ones expansion mutates —
+        # trail behind so additions only invalidate the prompt's tail.
+        stable_levels = (ConceptLevel.FOUNDATIONAL, ConceptLevel.INTERMEDIATE)
+        concepts = sorted(kg.get_all_concepts(), key=lambda n: n.id)
+        frozen_block = "\n".join(
+            kg.rendered_line(n.id) for n in concepts if n.level in stable_levels
+        )
+        recent_block = "\n".join(
+            kg.rendered_line(n.id) for n in concepts if n.level not in stable_levels
         )
+        existing = "\n".join(block for block in (frozen_block, recent_block) if block)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Expansion prompt memory_pack_v=%s",
+                hashlib.md5(frozen_block.encode("utf-8")).hexdigest(),
+            )
 
         user_prompt = EXPANSION_USER_PROMPT.format(
             existing_concepts=existing,
-            num_new=num_new,
+            num_waves=num_waves,
+            per_wave=per_wave,
         )
+        if focus_types:
+            # Appended at the tail so the shared prompt prefix stays
+            # byte-identical across shards for the server's prefix cache.
+            user_prompt += (
+                "\n\nFocus this batch on concepts of type: "
+                + ", ".join(t.value for t in focus_types) + "."
+            )
 
-        response_text = chat_completion(
-            self.client, self.model, system_prompt, user_prompt,
-            max_tokens=4096, temperature=0.3,
+        response_text = await chat_completion_async(
+            self.async_client, self.model, _SYSTEM_PROMPT, user_prompt,
+            max_tokens=4096 * num_waves, temperature=0.3,
+            response_format=JSON_RESPONSE_FORMAT,
         )
 
         data = parse_json_response(response_text)
+        waves = data.get("waves", [])
+        if not waves and data.get("new_nodes"):
+            # Model ignored the wave structure — treat as a single wave
+            waves = [data]
+        return waves
 
-        existing_ids = {n.id for n in kg.get_all_concepts()}
+    def _ingest_wave(self, kg: KnowledgeGraph, data: dict) -> tuple[list[ConceptNode], list[Edge]]:
+        """Validate one wave's nodes and edges against the current graph."""
+        # Live view of the graph's ids — O(1) membership with no per-wave
+        # set construction.
+        existing_ids = kg.ids()
+        # Validation is gate-based rather than try/except per item: field
+        # presence and enum values are checked with dict/set lookups up
+        # front, so a 50-item response costs no exception machinery.
         new_nodes = []
         for nd in data.get("new_nodes", []):
-            if nd.get("id") in existing_ids:
+            node_id = nd.get("id")
+            if not node_id or node_id in existing_ids:
                 continue
-            try:
-                node = ConceptNode(
-                    id=nd["id"],
-                    name=nd["name"],
-                    type=ConceptType(nd.get("type", "architecture")),
-                    level=ConceptLevel(nd.get("level", "frontier")),
-                    description=nd.get("description", ""),
-                    key_ideas=nd.get("key_ideas", []),
-                    code_refs=nd.get("code_refs", []),
-                    confidence=nd.get("confidence", 0.8),
-                )
-                new_nodes.append(node)
-            except (KeyError, ValueError) as e:
-                logger.warning("Skipping invalid expansion node: %s", e)
+            name = nd.get("name")
+            type_value = nd.get("type", "architecture")
+            level_value = nd.get("level", "frontier")
+            if not name or type_value not in _VALID_TYPES or level_value not in _VALID_LEVELS:
+                logger.warning("Skipping invalid expansion node: %s", node_id)
+                continue
+            new_nodes.append(ConceptNode(
+                id=node_id,
+                name=name,
+                type=ConceptType(type_value),
+                level=ConceptLevel(level_value),
+                description=nd.get("description", ""),
+                key_ideas=nd.get("key_ideas", []),
+                code_refs=nd.get("code_refs", []),
+                confidence=nd.get("confidence", 0.8),
+            ))
 
         new_node_ids = {n.id for n in new_nodes}
-        all_valid = existing_ids | new_node_ids
 
         new_edges = []
         for ed in data.get("new_edges", []):
-            try:
-                source = ed["source"]
-                target = ed["target"]
-                if source not in all_valid or target not in all_valid:
-                    continue
-                edge = Edge(
-                    source=source,
-                    target=target,
-                    relationship=RelationshipType(ed.get("relationship", "builds_on")),
-                    description=ed.get("description", ""),
-                )
-                new_edges.append(edge)
-            except (KeyError, ValueError) as e:
-                logger.warning("Skipping invalid expansion edge: %s", e)
+            source = ed.get("source")
+            target = ed.get("target")
+            if source not in existing_ids and source not in new_node_ids:
+                continue
+            if target not in existing_ids and target not in new_node_ids:
+                continue
+            rel_value = ed.get("relationship", "builds_on")
+            if rel_value not in _VALID_RELATIONSHIPS:
+                logger.warning("Skipping invalid expansion edge: %s->%s", source, target)
+                continue
+            new_edges.append(Edge(
+                source=source,
+                target=target,
+                relationship=RelationshipType(rel_value),
+                description=ed.get("description", ""),
+            ))
 
         return new_nodes, new_edges
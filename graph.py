@@ -1,110 +1,178 @@
-"""NetworkX-based knowledge graph for transformer concepts."""
+"""Dict-based knowledge graph for transformer concepts."""
 
 from __future__ import annotations
 
-import json
+from collections import Counter, deque
+from operator import attrgetter
 from pathlib import Path
-from typing import Optional
-
-import networkx as nx
+from typing import Iterable, Optional
 
+from kg_extractor.jsonio import dump_json, load_json
 from kg_extractor.models import ConceptNode, Edge, ConceptLevel, RelationshipType
 
 
 class KnowledgeGraph:
-    """Manages the concept knowledge graph using NetworkX."""
+    """Manages the concept knowledge graph using plain dict adjacency.
+
+    A full graph library is overkill here: the graph only needs add,
+    predecessor/successor lookup, and a topological sort, so adjacency is
+    two dicts instead of a NetworkX DiGraph (which would duplicate every
+    node's attributes and every edge into its own per-node dicts).
+    """
 
     def __init__(self):
-        self.g = nx.DiGraph()
         self._nodes: dict[str, ConceptNode] = {}
         self._edges: list[Edge] = []
+        self._topo_cache: Optional[list[str]] = None
+        # Incrementally maintained degree counts so frontier/root queries
+        # don't walk every node's adjacency on each call.
+        self._in_deg: dict[str, int] = {}
+        self._out_deg: dict[str, int] = {}
+        # source -> {target: relationship}, target -> {source, ...}
+        self._succ: dict[str, dict[str, RelationshipType]] = {}
+        self._pred: dict[str, set[str]] = {}
+        # Pre-rendered prompt lines, built once per concept instead of
+        # re-formatting the whole graph on every expansion round.
+        self._rendered_lines: dict[str, str] = {}
+        # Per-level counts maintained on add so stats() is O(1) instead of
+        # four full node scans per poll.
+        self._level_counts: Counter = Counter()
+        # Marker-free mermaid lines, rebuilt only when the graph changes;
+        # UI polls re-render only the nodes that carry progress markers.
+        self._mermaid_cache: Optional[tuple[dict[str, str], list[str]]] = None
 
     def add_concept(self, node: ConceptNode) -> None:
+        prev = self._nodes.get(node.id)
+        if prev is not None:
+            self._level_counts[prev.level] -= 1
+        self._level_counts[node.level] += 1
         self._nodes[node.id] = node
-        self.g.add_node(node.id, **node.to_dict())
+        self._in_deg.setdefault(node.id, 0)
+        self._out_deg.setdefault(node.id, 0)
+        self._rendered_lines[node.id] = (
+            f"- {node.id}: {node.name} ({node.type.value}, {node.level.value}) "
+            f"— {node.description[:100]}"
+        )
+        self._topo_cache = None
+        self._mermaid_cache = None
 
     def add_edge(self, edge: Edge) -> None:
         self._edges.append(edge)
-        self.g.add_edge(
-            edge.source,
-            edge.target,
-            relationship=edge.relationship.value,
-            weight=edge.weight,
-            description=edge.description,
-        )
+        self._out_deg[edge.source] = self._out_deg.get(edge.source, 0) + 1
+        self._in_deg[edge.target] = self._in_deg.get(edge.target, 0) + 1
+        self._in_deg.setdefault(edge.source, 0)
+        self._out_deg.setdefault(edge.target, 0)
+        self._succ.setdefault(edge.source, {})[edge.target] = edge.relationship
+        self._pred.setdefault(edge.target, set()).add(edge.source)
+        self._topo_cache = None
+        self._mermaid_cache = None
 
     def get_concept(self, concept_id: str) -> Optional[ConceptNode]:
         return self._nodes.get(concept_id)
 
+    def ids(self):
+        """View of all concept ids (O(1) membership tests, no copy)."""
+        return self._nodes.keys()
+
+    def rendered_line(self, concept_id: str) -> str:
+        """Pre-rendered one-line prompt summary for a concept."""
+        return self._rendered_lines.get(concept_id, "")
+
     def get_prerequisites(self, concept_id: str) -> list[str]:
         """Get all concepts that this concept requires (predecessors via REQUIRES/BUILDS_ON)."""
-        prereqs = []
-        for pred in self.g.predecessors(concept_id):
-            edge_data = self.g.edges[pred, concept_id]
-            rel = edge_data.get("relationship", "")
-            if rel in (RelationshipType.REQUIRES.value, RelationshipType.BUILDS_ON.value):
-                prereqs.append(pred)
-        return prereqs
+        # Compare enum members directly — the str mixin makes this a C-level
+        # string comparison with no .value descriptor lookup per edge.
+        return [
+            pred
+            for pred in self._pred.get(concept_id, ())
+            if self._succ[pred][concept_id]
+            in (RelationshipType.REQUIRES, RelationshipType.BUILDS_ON)
+        ]
 
     def get_dependents(self, concept_id: str) -> list[str]:
         """Get concepts that depend on this concept."""
-        deps = []
-        for succ in self.g.successors(concept_id):
-            edge_data = self.g.edges[concept_id, succ]
-            rel = edge_data.get("relationship", "")
-            if rel in (RelationshipType.REQUIRES.value, RelationshipType.BUILDS_ON.value):
-                deps.append(succ)
-        return deps
+        return [
+            succ
+            for succ, rel in self._succ.get(concept_id, {}).items()
+            if rel in (RelationshipType.REQUIRES, RelationshipType.BUILDS_ON)
+        ]
 
     def topological_sort(self) -> list[str]:
-        """Return concepts in topological order (prerequisites first)."""
-        try:
-            return list(nx.topological_sort(self.g))
-        except nx.NetworkXUnfeasible:
+        """Return concepts in topological order (prerequisites first).
+
+        The result is cached until the graph changes, so expansion followed
+        by course building does not recompute it.
+        """
+        if self._topo_cache is None:
+            self._topo_cache = self._kahn_sort()
+        return self._topo_cache
+
+    def _kahn_sort(self) -> list[str]:
+        """Kahn's algorithm over the internal adjacency maps.
+
+        Falls back to level-based ordering when the graph has cycles.
+        """
+        in_deg = dict(self._in_deg)
+        queue = deque(node_id for node_id, degree in in_deg.items() if degree == 0)
+        order = []
+        while queue:
+            node_id = queue.popleft()
+            order.append(node_id)
+            for succ in self._succ.get(node_id, ()):
+                in_deg[succ] -= 1
+                if in_deg[succ] == 0:
+                    queue.append(succ)
+
+        if len(order) < len(in_deg):
             # Graph has cycles — fall back to level-based ordering
             return self._level_based_sort()
+        return order
 
     def _level_based_sort(self) -> list[str]:
         level_order = {
-            ConceptLevel.FOUNDATIONAL.value: 0,
-            ConceptLevel.INTERMEDIATE.value: 1,
-            ConceptLevel.ADVANCED.value: 2,
-            ConceptLevel.FRONTIER.value: 3,
+            ConceptLevel.FOUNDATIONAL: 0,
+            ConceptLevel.INTERMEDIATE: 1,
+            ConceptLevel.ADVANCED: 2,
+            ConceptLevel.FRONTIER: 3,
         }
         nodes = list(self._nodes.values())
-        nodes.sort(key=lambda n: (level_order.get(n.level.value, 99), n.id))
+        nodes.sort(key=lambda n: (level_order.get(n.level, 99), n.id))
         return [n.id for n in nodes]
 
     def get_concepts_by_level(self, level: ConceptLevel) -> list[ConceptNode]:
         return [n for n in self._nodes.values() if n.level == level]
 
-    def get_all_concepts(self) -> list[ConceptNode]:
-        return list(self._nodes.values())
+    def get_all_concepts(self) -> Iterable[ConceptNode]:
+        """Live read-only view over all concepts (no copy per call)."""
+        return self._nodes.values()
 
-    def get_all_edges(self) -> list[Edge]:
-        return list(self._edges)
+    def iter_concept_fields(self, *names: str) -> Iterable[tuple]:
+        """Project the named fields of every concept as tuples.
+
+        One C-level attrgetter fetch per node replaces a LOAD_ATTR per
+        field for callers that only need a few columns of the node list.
+        """
+        return map(attrgetter(*names), self._nodes.values())
+
+    def get_all_edges(self) -> Iterable[Edge]:
+        """Live read-only view over all edges (no copy per call)."""
+        return self._edges
 
     def get_frontier_concepts(self) -> list[ConceptNode]:
         """Get leaf concepts (no outgoing prerequisite edges)."""
-        frontier = []
-        for node_id in self.g.nodes():
-            successors = list(self.g.successors(node_id))
-            if not successors:
-                node = self._nodes.get(node_id)
-                if node:
-                    frontier.append(node)
-        return frontier
+        return [
+            self._nodes[node_id]
+            for node_id, degree in self._out_deg.items()
+            if degree == 0 and node_id in self._nodes
+        ]
 
     def get_root_concepts(self) -> list[ConceptNode]:
         """Get root concepts (no incoming prerequisite edges)."""
-        roots = []
-        for node_id in self.g.nodes():
-            predecessors = list(self.g.predecessors(node_id))
-            if not predecessors:
-                node = self._nodes.get(node_id)
-                if node:
-                    roots.append(node)
-        return roots
+        return [
+            self._nodes[node_id]
+            for node_id, degree in self._in_deg.items()
+            if degree == 0 and node_id in self._nodes
+        ]
 
     def subgraph(self, concept_ids: list[str]) -> KnowledgeGraph:
         """Create a subgraph containing only the specified concepts."""
@@ -135,11 +203,11 @@ class KnowledgeGraph:
 
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+        dump_json(path, self.to_dict())
 
     @classmethod
     def load(cls, path: Path) -> KnowledgeGraph:
-        return cls.from_dict(json.loads(path.read_text()))
+        return cls.from_dict(load_json(path))
 
     def to_mermaid(self, completed: list[str] = None, current: str = None,
                    friends: dict[str, dict] = None) -> str:
@@ -150,10 +218,10 @@ class KnowledgeGraph:
             current: current concept ID
             friends: dict of {friend_name: {"avatar": "🦊", "current_concept": "..."}}
         """
-        completed = completed or []
+        # O(1) membership per node instead of scanning the completed list
+        completed = set(completed or ())
         friends = friends or {}
 
-        lines = ["graph LR"]
         # Build friend positions: concept_id -> list of avatars
         friend_positions: dict[str, list[str]] = {}
         for fname, fdata in friends.items():
@@ -161,32 +229,52 @@ class KnowledgeGraph:
             if fc:
                 friend_positions.setdefault(fc, []).append(fdata.get("avatar", "👤"))
 
-        for node in self._nodes.values():
-            label = node.name
+        node_lines, edge_lines = self._mermaid_base()
+
+        lines = ["graph LR"]
+        for node_id, base_line in node_lines.items():
             markers = []
-            if node.id in completed:
+            if node_id in completed:
                 markers.append("✅")
-            if node.id == current:
+            if node_id == current:
                 markers.append("👈")
-            avatars = friend_positions.get(node.id, [])
+            avatars = friend_positions.get(node_id, [])
             if avatars:
                 markers.extend(avatars)
             if markers:
-                label += " " + "".join(markers)
-            lines.append(f"    {node.id}[{label}]")
-
-        for edge in self._edges:
-            if edge.source in self._nodes and edge.target in self._nodes:
-                lines.append(f"    {edge.source} --> {edge.target}")
+                label = self._nodes[node_id].name + " " + "".join(markers)
+                lines.append(f"    {node_id}[{label}]")
+            else:
+                lines.append(base_line)
 
+        lines.extend(edge_lines)
         return "\n".join(lines)
 
+    def _mermaid_base(self) -> tuple[dict[str, str], list[str]]:
+        """Marker-free node lines (by id) and edge lines, cached per graph state.
+
+        Progress markers change every poll but the graph rarely does, so
+        renders only re-format the handful of marked nodes.
+        """
+        if self._mermaid_cache is None:
+            node_lines = {
+                node.id: f"    {node.id}[{node.name}]"
+                for node in self._nodes.values()
+            }
+            edge_lines = [
+                f"    {edge.source} --> {edge.target}"
+                for edge in self._edges
+                if edge.source in self._nodes and edge.target in self._nodes
+            ]
+            self._mermaid_cache = (node_lines, edge_lines)
+        return self._mermaid_cache
+
     def stats(self) -> dict:
         return {
             "num_concepts": len(self._nodes),
             "num_edges": len(self._edges),
-            "num_foundational": len(self.get_concepts_by_level(ConceptLevel.FOUNDATIONAL)),
-            "num_intermediate": len(self.get_concepts_by_level(ConceptLevel.INTERMEDIATE)),
-            "num_advanced": len(self.get_concepts_by_level(ConceptLevel.ADVANCED)),
-            "num_frontier": len(self.get_concepts_by_level(ConceptLevel.FRONTIER)),
+            "num_foundational": self._level_counts[ConceptLevel.FOUNDATIONAL],
+            "num_intermediate": self._level_counts[ConceptLevel.INTERMEDIATE],
+            "num_advanced": self._level_counts[ConceptLevel.ADVANCED],
+            "num_frontier": self._level_counts[ConceptLevel.FRONTIER],
         }
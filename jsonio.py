@@ -0,0 +1,32 @@
+"""JSON serialization helpers, orjson-accelerated with a stdlib fallback."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+
+def dump_json(path: Path, obj) -> None:
+    """Write obj to path as indented JSON with a trailing newline.
+
+    orjson serializes straight to UTF-8 bytes, skipping the intermediate
+    Python str that json.dumps(indent=2) builds.
+    """
+    if orjson is not None:
+        path.write_bytes(
+            orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+        )
+    else:
+        path.write_text(json.dumps(obj, indent=2, ensure_ascii=False) + "\n")
+
+
+def load_json(path: Path) -> dict:
+    """Read a JSON file, using orjson's C parser when available."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text())
@@ -0,0 +1,64 @@
+"""On-disk cache for parsed LLM responses, keyed by prompt hash."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "kg_extractor" / "llm"
+
+
+class LLMCache:
+    """Caches parsed LLM responses on disk so reruns skip unchanged prompts.
+
+    Entries are stored as {cache_dir}/{hash[:2]}/{hash}.json where the hash
+    covers the model, prompts, and sampling parameters. The cached value is
+    the parsed dict (post parse_json_response), so hits also skip JSON
+    parsing and repair.
+    """
+
+    def __init__(self, cache_dir: Optional[str | Path] = None):
+        self.cache_dir = Path(
+            cache_dir or os.environ.get("KG_EXTRACTOR_CACHE_DIR", DEFAULT_CACHE_DIR)
+        )
+
+    @staticmethod
+    def key(model: str, system: str, user: str, max_tokens: int, temperature: float) -> str:
+        """Compute the cache key for one completion request."""
+        payload = "\x00".join([model, system, user, str(max_tokens), str(temperature)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached parsed response, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.debug("Discarding unreadable cache entry %s: %s", path, e)
+            return None
+        logger.debug("LLM cache hit: %s", key[:12])
+        return data
+
+    def set(self, key: str, value: dict) -> None:
+        """Store a parsed response. Empty responses are not cached."""
+        if not value:
+            return
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(value, ensure_ascii=False) + "\n")
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug("Could not write cache entry %s: %s", path, e)
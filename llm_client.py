@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import os
@@ -9,38 +10,98 @@ from typing import Optional
 
 import openai
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+
+def _loads(text: str) -> dict:
+    """Parse JSON with orjson when available (C parser, several times faster)."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
 DEFAULT_BASE_URL = "http://localhost:8000/v1"
 
+# Shared shorthand for JSON-mode responses.
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
 
-def get_client(base_url: Optional[str] = None) -> openai.OpenAI:
-    """Get an OpenAI-compatible client pointing at the local vLLM server."""
-    url = base_url or os.environ.get("VLLM_BASE_URL", DEFAULT_BASE_URL)
+
+# One client per base URL, shared by every extractor/builder/expander so all
+# requests reuse the same keep-alive connection pool instead of paying a TCP
+# handshake per component. lru_cache's C-level lock also makes construction
+# safe when components are created from multiple threads.
+
+
+@functools.lru_cache(maxsize=4)
+def _client_for(url: str) -> openai.OpenAI:
     return openai.OpenAI(base_url=url, api_key="unused")
 
 
-def chat_completion(
-    client: openai.OpenAI,
+@functools.lru_cache(maxsize=4)
+def _async_client_for(url: str) -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(base_url=url, api_key="unused")
+
+
+def get_client(base_url: Optional[str] = None) -> openai.OpenAI:
+    """Get the shared OpenAI-compatible client for the vLLM server."""
+    return _client_for(base_url or os.environ.get("VLLM_BASE_URL", DEFAULT_BASE_URL))
+
+
+def get_async_client(base_url: Optional[str] = None) -> openai.AsyncOpenAI:
+    """Get the shared async OpenAI-compatible client for concurrent requests."""
+    return _async_client_for(base_url or os.environ.get("VLLM_BASE_URL", DEFAULT_BASE_URL))
+
+
+def _structured_output_kwargs(
+    response_format: Optional[dict], extra_body: Optional[dict]
+) -> dict:
+    """Optional structured-output arguments to forward to the server.
+
+    response_format={"type": "json_object"} (or vLLM's guided_json via
+    extra_body) makes the server constrain decoding to valid JSON, so
+    responses can't truncate mid-object in the first place.
+    """
+    kwargs = {}
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    if extra_body is not None:
+        kwargs["extra_body"] = extra_body
+    return kwargs
+
+
+async def chat_completion_async(
+    client: openai.AsyncOpenAI,
     model: str,
     system: str,
     user: str,
     max_tokens: int = 8192,
     temperature: float = 0.3,
+    response_format: Optional[dict] = None,
+    extra_body: Optional[dict] = None,
 ) -> str:
-    """Send a chat completion request and return the response text."""
+    """Async variant of chat_completion for concurrent vLLM requests.
+
+    vLLM batches concurrent requests into the same forward passes, so N
+    in-flight requests cost close to one request's wall time.
+    """
     messages = []
     if system:
         messages.append({"role": "system", "content": system})
     messages.append({"role": "user", "content": user})
 
-    logger.debug("Sending chat completion request (model=%s, max_tokens=%d)", model, max_tokens)
+    logger.debug("Sending async chat completion request (model=%s, max_tokens=%d)", model, max_tokens)
 
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=model,
         messages=messages,
         max_tokens=max_tokens,
         temperature=temperature,
+        **_structured_output_kwargs(response_format, extra_body),
     )
 
     text = response.choices[0].message.content
@@ -48,8 +109,90 @@ def chat_completion(
     return text or ""
 
 
+async def completion_batch_async(
+    client: openai.AsyncOpenAI,
+    model: str,
+    prompts: list[str],
+    max_tokens: int = 6144,
+    temperature: float = 0.3,
+) -> list[str]:
+    """Send a list of prompts to /v1/completions in one HTTP round-trip.
+
+    vLLM's OpenAI-compatible server accepts a list in the prompt field and
+    schedules all completions in the same tick; only the completions API
+    (not chat) supports list prompts. Results are aligned by choice index.
+    """
+    logger.debug("Sending batch completion request (model=%s, prompts=%d)", model, len(prompts))
+
+    response = await client.completions.create(
+        model=model,
+        prompt=prompts,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+    texts = [""] * len(prompts)
+    for choice in response.choices:
+        texts[choice.index] = choice.text or ""
+    return texts
+
+
+def chat_completion(
+    client: openai.OpenAI,
+    model: str,
+    system: str,
+    user: str,
+    max_tokens: int = 8192,
+    temperature: float = 0.3,
+    response_format: Optional[dict] = None,
+    extra_body: Optional[dict] = None,
+) -> str:
+    """Send a chat completion request and return the response text.
+
+    The response is streamed and assembled chunk-by-chunk: the bytes flow
+    while the server is still decoding instead of sitting in its buffer
+    until the final token, which shaves the time-to-first-token wait off
+    long generations.
+    """
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": user})
+
+    logger.debug("Sending chat completion request (model=%s, max_tokens=%d)", model, max_tokens)
+
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+        **_structured_output_kwargs(response_format, extra_body),
+    )
+
+    # Collect into a list and join once — repeated += would recopy the
+    # accumulated string on every chunk.
+    parts: list[str] = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+
+    text = "".join(parts)
+    logger.debug("Got response: %d chars", len(text))
+    return text
+
+
 def parse_json_response(text: str) -> dict:
     """Parse JSON from an LLM response, handling markdown code blocks and truncation."""
+    # Fast path: a well-behaved response is bare JSON and needs no fence
+    # stripping at all.
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            return _loads(stripped)
+        except ValueError:
+            pass
+
     # Strip markdown code fences.  Use rfind for the closing fence because the
     # JSON value itself may contain nested ```python blocks.
     if "```json" in text:
@@ -63,16 +206,16 @@ def parse_json_response(text: str) -> dict:
         text = text[start:end].strip() if end > start else text[start:].strip()
 
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return _loads(text)
+    except ValueError:
         pass
 
     # Try to repair truncated JSON: close open strings and braces
     repaired = _repair_truncated_json(text)
     if repaired:
         try:
-            return json.loads(repaired)
-        except json.JSONDecodeError:
+            return _loads(repaired)
+        except ValueError:
             pass
 
     logger.error("Failed to parse LLM response as JSON (len=%d)", len(text))
@@ -81,31 +224,41 @@ def parse_json_response(text: str) -> dict:
 
 
 def _repair_truncated_json(text: str) -> str:
-    """Best-effort repair of JSON truncated by max_tokens."""
+    """Best-effort repair of JSON truncated by max_tokens.
+
+    A single pass tracks string/escape state alongside a stack of open
+    containers, so braces and brackets inside string values don't skew
+    the accounting, and the closers come out in the right nesting order.
+    """
     text = text.strip()
     if not text.startswith("{"):
         return ""
 
-    # If inside an unterminated string, close it
-    # Count unescaped quotes
     in_string = False
+    stack = []
     i = 0
-    while i < len(text):
+    n = len(text)
+    while i < n:
         c = text[i]
-        if c == "\\" and in_string:
-            i += 2  # skip escaped char
-            continue
-        if c == '"':
-            in_string = not in_string
+        if in_string:
+            if c == "\\":
+                i += 2  # skip escaped char
+                continue
+            if c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack and stack[-1] == c:
+            stack.pop()
         i += 1
 
     if in_string:
         text += '"'
-
-    # Close open braces/brackets
-    open_braces = text.count("{") - text.count("}")
-    open_brackets = text.count("[") - text.count("]")
-    text += "]" * max(0, open_brackets)
-    text += "}" * max(0, open_braces)
-
+    elif text.endswith(","):
+        # Truncated right after a comma — drop it so the closers parse
+        text = text[:-1]
+    if stack:
+        text += "".join(reversed(stack))
     return text
@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass, field, asdict
 from datetime import date, datetime
 from enum import Enum
 from pathlib import Path
 from typing import Optional
 
+from kg_extractor.jsonio import dump_json, load_json
+
 
 class ConceptType(str, Enum):
     ARCHITECTURE = "architecture"
@@ -39,6 +40,14 @@ class ConceptLevel(str, Enum):
     FRONTIER = "frontier"
 
 
+# Value -> member maps for deserialization fast paths: a plain dict hit
+# instead of the Enum __call__ lookup machinery, which adds up over the
+# thousands of enum coercions in a large graph load.
+_CT_MAP = {m.value: m for m in ConceptType}
+_RT_MAP = {m.value: m for m in RelationshipType}
+_CL_MAP = {m.value: m for m in ConceptLevel}
+
+
 # Maps concept level to AIN exploration depth (1-4)
 CONCEPT_LEVEL_DEPTH: dict[str, int] = {
     ConceptLevel.FOUNDATIONAL: 1,
@@ -48,7 +57,7 @@ CONCEPT_LEVEL_DEPTH: dict[str, int] = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class ConceptNode:
     id: str
     name: str
@@ -70,13 +79,13 @@ class ConceptNode:
     @classmethod
     def from_dict(cls, d: dict) -> ConceptNode:
         d = d.copy()
-        d["type"] = ConceptType(d["type"])
-        d["level"] = ConceptLevel(d["level"])
+        d["type"] = _CT_MAP[d["type"]]
+        d["level"] = _CL_MAP[d["level"]]
         d.setdefault("paper_ref", "")
         return cls(**d)
 
 
-@dataclass
+@dataclass(slots=True)
 class Edge:
     source: str  # concept id
     target: str  # concept id
@@ -92,11 +101,11 @@ class Edge:
     @classmethod
     def from_dict(cls, d: dict) -> Edge:
         d = d.copy()
-        d["relationship"] = RelationshipType(d["relationship"])
+        d["relationship"] = _RT_MAP[d["relationship"]]
         return cls(**d)
 
 
-@dataclass
+@dataclass(slots=True)
 class Lesson:
     concept_id: str
     title: str
@@ -121,7 +130,7 @@ class Lesson:
         return cls(**d)
 
 
-@dataclass
+@dataclass(slots=True)
 class Course:
     id: str
     title: str
@@ -141,7 +150,7 @@ class Course:
         return cls(**d)
 
 
-@dataclass
+@dataclass(slots=True)
 class LearnerProfile:
     name: str = "Learner"
     avatar: str = "🧑‍💻"
@@ -162,14 +171,14 @@ class LearnerProfile:
 
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+        dump_json(path, self.to_dict())
 
     @classmethod
     def load(cls, path: Path) -> LearnerProfile:
-        return cls.from_dict(json.loads(path.read_text()))
+        return cls.from_dict(load_json(path))
 
 
-@dataclass
+@dataclass(slots=True)
 class LearnerProgress:
     current_concept: str = ""
     completed: list[str] = field(default_factory=list)
@@ -193,14 +202,14 @@ class LearnerProgress:
 
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+        dump_json(path, self.to_dict())
 
     @classmethod
     def load(cls, path: Path) -> LearnerProgress:
-        return cls.from_dict(json.loads(path.read_text()))
+        return cls.from_dict(load_json(path))
 
 
-@dataclass
+@dataclass(slots=True)
 class RepoAnalysis:
     """Results from mining the HF Transformers repo."""
     models: list[dict] = field(default_factory=list)       # model name, path, first commit date
@@ -2,17 +2,38 @@
 
 from __future__ import annotations
 
+import ast
 import logging
+import mmap
+import os
 import re
+import sys
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from git import Repo, InvalidGitRepositoryError
 
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover - optional accelerator
+    hyperscan = None
+
+try:
+    import pygit2
+except ImportError:  # pragma: no cover - optional accelerator
+    pygit2 = None
+
+from kg_extractor.jsonio import dump_json, load_json
 from kg_extractor.models import RepoAnalysis
 
 logger = logging.getLogger(__name__)
 
+# Analysis results cached per HEAD commit; only the newest few are kept.
+DEFAULT_ANALYSIS_CACHE_DIR = Path.home() / ".cache" / "kg_extractor" / "analysis"
+ANALYSIS_CACHE_KEEP = 3
+
 # Keywords indicating important architectural commits
 EVOLUTION_KEYWORDS = [
     "add model", "new model", "flash attention", "quantization",
@@ -25,6 +46,108 @@ EVOLUTION_KEYWORDS = [
 # Maximum number of commits to scan for evolution keywords
 MAX_COMMIT_SCAN = 5000
 
+# First non-empty paragraph after the first markdown header, with any
+# leading frontmatter/license-comment blocks skipped — one C-level scan
+# instead of a per-line Python state machine over each doc.
+_SUMMARY_RE = re.compile(
+    r"(?:^---\n.*?\n---\n|<!--.*?-->\s*)*^#[^\n]*\n+((?:[^\n#][^\n]*\n?)+)",
+    re.MULTILINE | re.DOTALL,
+)
+
+# Single alternation over all evolution keywords: git filters commits with
+# it natively, and the compiled form tags each surviving subject line.
+# re.IGNORECASE folds case inside the engine, so no per-commit .lower()
+# copy of the message is ever allocated; only the short matched needle is
+# lowercased to canonicalize the keyword tag.
+_EVO_GREP = "|".join(re.escape(k) for k in EVOLUTION_KEYWORDS)
+_EVO_KEYWORD_RE = re.compile(_EVO_GREP, re.IGNORECASE)
+
+# Compiled once at import — these run over every modeling file in the tree,
+# and the bound finditer skips re's per-call cache lookup and pattern parse.
+# Bytes patterns: the patterns are pure ASCII, so matching raw file bytes
+# skips a full UTF-8 decode per file; only captured names get decoded.
+_CLASS_RE = re.compile(rb"^class\s+(\w+)\s*[\(:]", re.MULTILINE)
+_ATTN_CLASS_RE = re.compile(
+    rb"^class\s+(\w*(?:Attention|SelfAttention|MultiHeadAttention)\w*)\s*[\(:]",
+    re.MULTILINE,
+)
+
+# Hyperscan compiles the same pattern into a DFA scanned at native speed —
+# an order of magnitude faster than Python's backtracking engine on the
+# whole-repo modeling-file pass. Optional; the compiled re is the fallback.
+_ATTN_HS_DB = None
+if hyperscan is not None:
+    _ATTN_HS_DB = hyperscan.Database()
+    _ATTN_HS_DB.compile(
+        expressions=[rb"^class\s+\w*(?:Attention|SelfAttention|MultiHeadAttention)\w*\s*[(:]"],
+        flags=[hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SOM_LEFTMOST],
+    )
+
+
+def _attention_classes_in(content: bytes | mmap.mmap) -> set[str]:
+    """Attention-variant class names defined in one file's source."""
+    # Every needle in the pattern contains the literal "Attention", so a
+    # plain substring probe (C-level memmem, memory-bandwidth speed)
+    # rejects the vast majority of files before any regex engine runs.
+    if b"Attention" not in content:
+        return set()
+
+    if _ATTN_HS_DB is not None:
+        found: set[str] = set()
+
+        def on_match(_id, start, end, _flags, _ctx):
+            m = _ATTN_CLASS_RE.match(content[start:end])
+            if m:
+                found.add(m.group(1).decode("ascii", "replace"))
+
+        _ATTN_HS_DB.scan(content, match_event_handler=on_match)
+        return found
+
+    return {m.group(1).decode("ascii", "replace") for m in _ATTN_CLASS_RE.finditer(content)}
+
+
+def _scan_one_modeling_file(path: str) -> list[str]:
+    """Worker: attention-variant class names in one modeling file.
+
+    Module-level so ProcessPoolExecutor can pickle it; returns a list,
+    which pickles more cheaply than a set.
+    """
+    try:
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return list(_attention_classes_in(mm))
+    except Exception:
+        return []
+
+
+def _summarize_one_doc(path: str) -> Optional[tuple[str, str, int]]:
+    """Worker: (path, summary, content length) for one model doc."""
+    try:
+        content = Path(path).read_text(errors="replace")
+    except Exception:
+        return None
+    return path, _extract_doc_summary(content), len(content)
+
+
+def _scandir_recursive(path: str) -> Iterator[os.DirEntry]:
+    """Yield file DirEntry objects under path, depth-first.
+
+    os.scandir returns each entry's type from the directory read itself,
+    so the walk costs no stat() per entry — unlike pathlib's iterdir/rglob,
+    which is the dominant overhead when walking a tree the size of
+    transformers.
+    """
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_symlink():
+                continue
+            if entry.is_file():
+                yield entry
+            elif entry.is_dir():
+                yield from _scandir_recursive(entry.path)
+
 
 class RepoAnalyzer:
     """Analyzes the HF Transformers git repository."""
@@ -35,11 +158,41 @@ class RepoAnalyzer:
             self.repo = Repo(self.repo_path)
         except InvalidGitRepositoryError:
             raise ValueError(f"{repo_path} is not a valid git repository")
+        self._first_commit_idx: Optional[dict[str, str]] = None
+        # Plain-string repo prefix for slicing relative paths off DirEntry
+        # paths without per-entry Path parsing, plus the fixed tree
+        # locations built once instead of re-joined in every _scan_* call.
+        self._repo_str = str(self.repo_path)
+        self._models_dir = self.repo_path / "src" / "transformers" / "models"
+        self._modeling_utils = self.repo_path / "src" / "transformers" / "modeling_utils.py"
+        self._docs_dir = self.repo_path / "docs" / "source" / "en" / "model_doc"
+        # libgit2 walks the object database in-process — no subprocess
+        # spawn or text parsing per history query. Optional.
+        self._pygit2_repo = None
+        if pygit2 is not None:
+            try:
+                self._pygit2_repo = pygit2.Repository(self._repo_str)
+            except Exception as e:
+                logger.debug("pygit2 could not open %s: %s", self.repo_path, e)
 
     def analyze(self) -> RepoAnalysis:
-        """Run full analysis pipeline."""
+        """Run full analysis pipeline.
+
+        The result is deterministic for a given repo state, so it is cached
+        on disk keyed by the HEAD sha — reruns against an unmoved checkout
+        cost one JSON parse instead of a full repo scan.
+        """
         logger.info("Starting repo analysis of %s", self.repo_path)
 
+        cache_path = self._analysis_cache_path()
+        if cache_path is not None and cache_path.exists():
+            try:
+                analysis = RepoAnalysis.from_dict(load_json(cache_path))
+                logger.info("Using cached analysis for HEAD %s", cache_path.stem[-8:])
+                return analysis
+            except Exception as e:
+                logger.debug("Discarding unreadable analysis cache %s: %s", cache_path, e)
+
         models = self._scan_models()
         logger.info("Found %d models", len(models))
 
@@ -52,28 +205,64 @@ class RepoAnalyzer:
         doc_summaries = self._scan_documentation()
         logger.info("Found %d model docs", len(doc_summaries))
 
-        return RepoAnalysis(
+        analysis = RepoAnalysis(
             models=models,
             components=components,
             key_commits=key_commits,
             doc_summaries=doc_summaries,
         )
+        if cache_path is not None:
+            self._store_cached_analysis(cache_path, analysis)
+        return analysis
+
+    def _analysis_cache_path(self) -> Optional[Path]:
+        """Cache file for the current HEAD, or None if HEAD is unresolvable."""
+        try:
+            head = self.repo.head.commit.hexsha
+        except Exception as e:
+            logger.debug("Could not resolve HEAD for analysis cache: %s", e)
+            return None
+        cache_dir = Path(
+            os.environ.get("KG_EXTRACTOR_CACHE_DIR", DEFAULT_ANALYSIS_CACHE_DIR)
+        )
+        return cache_dir / f"repo_analysis_{head}.json"
+
+    def _store_cached_analysis(self, path: Path, analysis: RepoAnalysis) -> None:
+        """Atomically write the analysis and expire all but the newest entries."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            dump_json(tmp, analysis.to_dict())
+            os.replace(tmp, path)
+            entries = sorted(
+                path.parent.glob("repo_analysis_*.json"),
+                key=lambda p: p.stat().st_mtime,
+                reverse=True,
+            )
+            for stale in entries[ANALYSIS_CACHE_KEEP:]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.debug("Could not write analysis cache %s: %s", path, e)
 
     def _scan_models(self) -> list[dict]:
         """Scan src/transformers/models/*/ for model directories."""
-        models_dir = self.repo_path / "src" / "transformers" / "models"
+        models_dir = self._models_dir
         if not models_dir.exists():
             logger.warning("Models directory not found: %s", models_dir)
             return []
 
-        models = []
-        for model_dir in sorted(models_dir.iterdir()):
-            if not model_dir.is_dir() or model_dir.name.startswith("_"):
-                continue
+        with os.scandir(models_dir) as it:
+            model_dirs = sorted(
+                (e for e in it if e.is_dir(follow_symlinks=False) and not e.name.startswith("_")),
+                key=lambda e: e.name,
+            )
 
+        models = []
+        for model_dir in model_dirs:
+            rel_path = model_dir.path[len(self._repo_str) + 1:]
             model_info = {
                 "name": model_dir.name,
-                "path": str(model_dir.relative_to(self.repo_path)),
+                "path": rel_path,
                 "classes": [],
                 "first_commit_date": None,
                 "has_modeling": False,
@@ -81,50 +270,91 @@ class RepoAnalyzer:
                 "has_tokenizer": False,
             }
 
-            # Check for key files
-            for f in model_dir.iterdir():
-                if f.name.startswith("modeling_"):
-                    model_info["has_modeling"] = True
-                    model_info["classes"].extend(self._extract_class_names(f))
-                elif f.name.startswith("configuration_"):
-                    model_info["has_config"] = True
-                elif "tokeniz" in f.name:
-                    model_info["has_tokenizer"] = True
+            # Check for key files — DirEntry names need no extra stat
+            with os.scandir(model_dir.path) as files:
+                for f in files:
+                    if f.name.startswith("modeling_"):
+                        model_info["has_modeling"] = True
+                        model_info["classes"].extend(self._extract_class_names(f.path))
+                    elif f.name.startswith("configuration_"):
+                        model_info["has_config"] = True
+                    elif "tokeniz" in f.name:
+                        model_info["has_tokenizer"] = True
 
             # Get first commit date for the model directory
-            model_info["first_commit_date"] = self._get_first_commit_date(
-                str(model_dir.relative_to(self.repo_path))
-            )
+            model_info["first_commit_date"] = self._get_first_commit_date(rel_path)
 
             models.append(model_info)
 
         return models
 
-    def _extract_class_names(self, filepath: Path) -> list[str]:
-        """Extract class names from a Python file."""
-        classes = []
+    def _extract_class_names(self, filepath: str | Path) -> list[str]:
+        """Extract top-level class names from a Python file.
+
+        ast.parse runs in C and, unlike the regex, cannot match a class
+        statement quoted inside a comment or string. Files that fail to
+        parse (partial checkouts, version-skewed syntax) fall back to the
+        regex scan.
+        """
         try:
-            content = filepath.read_text(errors="replace")
-            for match in re.finditer(r"^class\s+(\w+)\s*[\(:]", content, re.MULTILINE):
-                classes.append(match.group(1))
-        except Exception as e:
+            with open(filepath, "rb") as fh:
+                content = fh.read()
+        except OSError as e:
             logger.debug("Could not read %s: %s", filepath, e)
-        return classes
+            return []
+        # sys.intern collapses names repeated across models (PreTrainedModel,
+        # *Attention, ...) to one shared str in the final RepoAnalysis.
+        try:
+            tree = ast.parse(content, filename=str(filepath))
+            return [sys.intern(n.name) for n in tree.body if isinstance(n, ast.ClassDef)]
+        except (SyntaxError, ValueError):
+            return [
+                sys.intern(m.group(1).decode("ascii", "replace"))
+                for m in _CLASS_RE.finditer(content)
+            ]
 
     def _get_first_commit_date(self, path: str) -> Optional[str]:
-        """Get the date of the first commit that touched a path."""
+        """Get the date of the first commit that added files under a path."""
+        if self._first_commit_idx is None:
+            self._first_commit_idx = self._build_first_commit_index()
+        return self._first_commit_idx.get(path)
+
+    def _build_first_commit_index(self) -> dict[str, str]:
+        """Map each model directory to the date its files were first added.
+
+        One git log over the whole history replaces a per-directory history
+        walk (~300 of them on the transformers tree); --reverse means the
+        first commit seen touching a directory is its introduction.
+        """
+        prefix = "src/transformers/models/"
+        index: dict[str, str] = {}
         try:
-            commits = list(self.repo.iter_commits(paths=path, max_count=1, reverse=True))
-            if commits:
-                return commits[0].committed_datetime.strftime("%Y-%m-%d")
+            out = self.repo.git.log(
+                "--diff-filter=A", "--name-only", "--reverse",
+                "--format=%x00%cI", "--", prefix,
+            )
         except Exception as e:
-            logger.debug("Could not get first commit for %s: %s", path, e)
-        return None
+            logger.warning("Could not build first-commit index: %s", e)
+            return index
+
+        for block in out.split("\x00"):
+            if not block:
+                continue
+            date, _, files = block.partition("\n")
+            date = date[:10]  # ISO date portion of %cI
+            for filename in files.split("\n"):
+                if not filename.startswith(prefix):
+                    continue
+                slash = filename.find("/", len(prefix))
+                if slash == -1:
+                    continue  # file directly under models/, not a model dir
+                index.setdefault(filename[:slash], date)
+        return index
 
     def _scan_shared_components(self) -> list[dict]:
         """Identify shared components across models."""
         components = []
-        modeling_utils = self.repo_path / "src" / "transformers" / "modeling_utils.py"
+        modeling_utils = self._modeling_utils
         if modeling_utils.exists():
             classes = self._extract_class_names(modeling_utils)
             for cls_name in classes:
@@ -135,20 +365,15 @@ class RepoAnalyzer:
                 })
 
         # Check for attention implementations
-        attn_dir = self.repo_path / "src" / "transformers" / "models"
+        attn_dir = self._models_dir
         if attn_dir.exists():
+            paths = self._list_modeling_files(attn_dir)
             attn_classes = set()
-            for modeling_file in attn_dir.rglob("modeling_*.py"):
-                try:
-                    content = modeling_file.read_text(errors="replace")
-                    for match in re.finditer(
-                        r"^class\s+(\w*(?:Attention|SelfAttention|MultiHeadAttention)\w*)\s*[\(:]",
-                        content,
-                        re.MULTILINE,
-                    ):
-                        attn_classes.add(match.group(1))
-                except Exception:
-                    continue
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+                for names in ex.map(_scan_one_modeling_file, paths, chunksize=16):
+                    # Worker strings arrive unpickled as fresh objects;
+                    # intern on this side so duplicates share storage.
+                    attn_classes.update(map(sys.intern, names))
             # Report a summary rather than every individual class
             if attn_classes:
                 components.append({
@@ -160,71 +385,127 @@ class RepoAnalyzer:
 
         return components
 
+    def _list_modeling_files(self, attn_dir: Path) -> list[str]:
+        """Absolute paths of every modeling_*.py under the models tree.
+
+        The git index already holds a sorted list of tracked paths, so one
+        ls-files call replaces the readdir+stat walk over the whole tree;
+        the scandir walk remains as a fallback for untracked checkouts.
+        """
+        try:
+            out = self.repo.git.ls_files("src/transformers/models/*/modeling_*.py")
+            paths = [os.path.join(self._repo_str, p) for p in out.splitlines() if p]
+            if paths:
+                return paths
+        except Exception as e:
+            logger.debug("git ls-files failed, walking the tree instead: %s", e)
+        return [
+            entry.path
+            for entry in _scandir_recursive(str(attn_dir))
+            if entry.name.startswith("modeling_") and entry.name.endswith(".py")
+        ]
+
     def _scan_evolution_commits(self) -> list[dict]:
-        """Scan commit history for key architectural evolution commits."""
+        """Scan commit history for key architectural evolution commits.
+
+        git filters the history itself via a case-insensitive --grep
+        alternation, so only matching commits cross the process boundary —
+        no inflating thousands of commit objects to discard them in Python.
+        With pygit2 available, the walk happens in-process via libgit2
+        instead of spawning git at all.
+        """
+        if self._pygit2_repo is not None:
+            return self._scan_evolution_commits_pygit2()
+
         key_commits = []
         try:
-            for i, commit in enumerate(self.repo.iter_commits(max_count=MAX_COMMIT_SCAN)):
-                msg_lower = commit.message.lower()
-                for keyword in EVOLUTION_KEYWORDS:
-                    if keyword in msg_lower:
-                        key_commits.append({
-                            "sha": commit.hexsha[:8],
-                            "date": commit.committed_datetime.strftime("%Y-%m-%d"),
-                            "message": commit.message.strip().split("\n")[0][:200],
-                            "keyword": keyword,
-                            "author": str(commit.author),
-                        })
-                        break  # one keyword match per commit is enough
+            out = self.repo.git.log(
+                f"--max-count={MAX_COMMIT_SCAN}",
+                "-i", "-E", f"--grep={_EVO_GREP}",
+                "--format=%H%x1f%cI%x1f%an%x1f%s",
+            )
         except Exception as e:
             logger.warning("Error scanning commits: %s", e)
+            return key_commits
+
+        for line in out.splitlines():
+            if not line:
+                continue
+            sha, date, author, subject = line.split("\x1f", 3)
+            match = _EVO_KEYWORD_RE.search(subject)
+            key_commits.append({
+                "sha": sha[:8],
+                "date": date[:10],
+                "message": subject[:200],
+                # --grep also matches commit bodies; a subject without a
+                # keyword means the hit was in the body.
+                "keyword": sys.intern(match.group(0).lower()) if match else "",
+                "author": sys.intern(author),
+            })
+        return key_commits
+
+    def _scan_evolution_commits_pygit2(self) -> list[dict]:
+        """Evolution-commit scan over libgit2's in-process revision walker."""
+        key_commits = []
+        repo = self._pygit2_repo
+        try:
+            walker = repo.walk(repo.head.target, pygit2.GIT_SORT_TIME)
+            for i, commit in enumerate(walker):
+                if i >= MAX_COMMIT_SCAN:
+                    break
+                match = _EVO_KEYWORD_RE.search(commit.message)
+                if not match:
+                    continue
+                when = datetime.fromtimestamp(commit.commit_time, tz=timezone.utc)
+                key_commits.append({
+                    "sha": str(commit.id)[:8],
+                    "date": when.strftime("%Y-%m-%d"),
+                    "message": commit.message.strip().split("\n")[0][:200],
+                    "keyword": sys.intern(match.group(0).lower()),
+                    "author": sys.intern(commit.author.name),
+                })
+        except Exception as e:
+            logger.warning("Error scanning commits via pygit2: %s", e)
         return key_commits
 
     def _scan_documentation(self) -> list[dict]:
         """Extract summaries from model documentation."""
-        docs_dir = self.repo_path / "docs" / "source" / "en" / "model_doc"
+        return list(self._iter_doc_summaries())
+
+    def _iter_doc_summaries(self) -> Iterator[dict]:
+        """Yield one summary dict per model doc as workers finish.
+
+        Since summary extraction collapsed to a single compiled-regex
+        search, this phase is dominated by file reads — so the docs go
+        through a thread pool, which overlaps the IO waits (the GIL is
+        released during reads) without per-doc pickling, and the main
+        process holds only the in-flight results rather than every doc's
+        content.
+        """
+        docs_dir = self._docs_dir
         if not docs_dir.exists():
             logger.warning("Docs directory not found: %s", docs_dir)
-            return []
-
-        summaries = []
-        for doc_file in sorted(docs_dir.glob("*.md")):
-            try:
-                content = doc_file.read_text(errors="replace")
-                # Extract first paragraph after the title as summary
-                summary = self._extract_doc_summary(content)
-                summaries.append({
+            return
+
+        doc_files = sorted(docs_dir.glob("*.md"))
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as ex:
+            results = ex.map(_summarize_one_doc, (str(p) for p in doc_files))
+            for doc_file, result in zip(doc_files, results):
+                if result is None:
+                    logger.debug("Could not read doc %s", doc_file)
+                    continue
+                _, summary, length = result
+                yield {
                     "model": doc_file.stem,
-                    "file": str(doc_file.relative_to(self.repo_path)),
+                    "file": str(doc_file)[len(self._repo_str) + 1:],
                     "summary": summary,
-                    "length": len(content),
-                })
-            except Exception as e:
-                logger.debug("Could not read doc %s: %s", doc_file, e)
-
-        return summaries
+                    "length": length,
+                }
 
-    def _extract_doc_summary(self, content: str) -> str:
-        """Extract the first meaningful paragraph from a markdown doc."""
-        lines = content.split("\n")
-        in_content = False
-        summary_lines = []
-
-        for line in lines:
-            stripped = line.strip()
-            # Skip frontmatter, comments, and headers
-            if stripped.startswith("<!--") or stripped.startswith("---"):
-                continue
-            if stripped.startswith("#"):
-                if in_content:
-                    break  # hit next section
-                in_content = True
-                continue
-            if in_content and stripped:
-                summary_lines.append(stripped)
-                if len(" ".join(summary_lines)) > 500:
-                    break
-            elif in_content and not stripped and summary_lines:
-                break  # end of first paragraph
 
-        return " ".join(summary_lines)[:500]
+def _extract_doc_summary(content: str) -> str:
+    """Extract the first meaningful paragraph from a markdown doc."""
+    m = _SUMMARY_RE.search(content)
+    if not m:
+        return ""
+    return " ".join(m.group(1).split())[:500]
@@ -2,16 +2,32 @@
 
 from __future__ import annotations
 
-import json
+import functools
 import logging
+import os
 import shutil
+import string
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date
+from importlib import resources
 from pathlib import Path
 from typing import Optional
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+# linux/fs.h FICLONE — not exposed by the fcntl module on every Python
+_FICLONE = getattr(fcntl, "FICLONE", 0x40049409) if fcntl is not None else None
+
 from kg_extractor.graph import KnowledgeGraph
+from kg_extractor.jsonio import dump_json
 from kg_extractor.models import (
     CONCEPT_LEVEL_DEPTH,
+    ConceptLevel,
     Course,
     LearnerProfile,
     LearnerProgress,
@@ -20,227 +36,22 @@ from kg_extractor.models import (
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# Templates — base (non-blockchain)
+# Templates
 # ---------------------------------------------------------------------------
+# The two multi-KB CLAUDE.md templates live as package data in
+# kg_extractor/templates/ and are loaded lazily, so importing this module
+# doesn't pay for parsing and interning them.
 
-CLAUDE_MD_TEMPLATE = """\
-# Transformer Learning Path
-
-You are a friendly, knowledgeable tutor for this course.
-
-## Data files
-- Knowledge graph: knowledge/graph.json
-- Courses & lessons: knowledge/courses.json
-- Learner progress: .learner/progress.json
-- Learner profile: .learner/profile.json
-
-## How the learner talks to you
-The learner just chats — no slash commands. Recognise these intents:
-- "explore" / "show the graph" — render the knowledge graph as a Mermaid diagram,
-  marking completed concepts with a checkmark and current concept with an arrow.
-- "status" — show profile, completion %, current concept, and friends' positions.
-- "learn <concept>" or "teach me <concept>" — deliver the lesson (see teaching
-  style below).
-- "exercise" / "give me a challenge" — present the exercise for the current concept.
-- "done" / "I finished" — mark the current concept as completed, suggest next.
-- "friends" — list friends and their progress.
-- "next" / "what should I learn next?" — recommend the next concept via
-  prerequisites and graph topology.
-- "graph" — show full Mermaid graph of the current course.
-
-## Teaching style (important!)
-When teaching a concept:
-1. **Paper-first**: Start with the paper or origin — who wrote it, when, and what
-   problem it solved. If a lesson has a paper_ref field, cite it.
-2. **Short paragraphs**: 2-3 sentences max. Dense walls of text lose people.
-3. **Inline code**: Show small code snippets (< 15 lines) directly in your
-   message using fenced code blocks. NEVER say "open the file" or "look at
-   file X" — the learner is in a CLI chat and cannot open files.
-4. **One vivid analogy**: Include one concrete analogy or mental image to make
-   the concept stick.
-5. **Quiz exercise**: End with a quiz the learner can answer by typing a number
-   or a short sentence — multiple choice, predict-the-output, fill-in-the-blank,
-   or true/false. Never ask the learner to write code (too hard for a chat).
-   Never say "Explore the implementation of …" — that is too vague.
-6. **Fun**: Be encouraging, use light humour, celebrate progress.
-
-## Progress tracking
-- Read .learner/progress.json for current state.
-- Update it when learner completes concepts.
-- Read .learner/profile.json for learner identity.
-
-## Friends
-- Friends share their .learner/ data via git branches or a shared remote.
-- Check branches matching pattern "learner/*" for friends' progress files.
-- Show their emoji avatar + current concept when requested.
-
-## Graph structure
-- Nodes have: id, name, type, level, description, key_ideas, code_refs, paper_ref
-- Edges have: source, target, relationship (builds_on, requires, optimizes, etc.)
-- Levels: foundational -> intermediate -> advanced -> frontier
-"""
-
-CLAUDE_MD_BLOCKCHAIN_TEMPLATE = """\
-# Transformer Learning Path
-
-You are a friendly, knowledgeable tutor for this course.
 
-## Data files (read-only reference)
-- Knowledge graph: knowledge/graph.json
-- Courses & lessons: knowledge/courses.json
-- Learner profile: .learner/profile.json
-- Blockchain config: blockchain/config.json (provider_url, topic_map, depth_map)
+@functools.lru_cache(maxsize=None)
+def _template_bytes(name: str) -> bytes:
+    """Load a packaged template as raw bytes, once per process.
 
-## Progress tracking — blockchain is the source of truth
-NEVER write to .learner/progress.json or any JSON file to track progress.
-All progress is recorded on the AIN blockchain using ain-js directly.
-
-Read blockchain/config.json for:
-- `ain_js_path`: path to local ain-js library
-- `provider_url`: AIN node URL
-- `topic_map`: concept_id → AIN topic path
-- `depth_map`: concept_id → exploration depth (1-4)
-
-### ain-js API (use via inline node -e scripts)
-
-All commands follow this pattern — load config, init Ain, load wallet, call API:
-```bash
-node -e "
-  const Ain = require(require('./blockchain/config.json').ain_js_path).default;
-  const cfg = require('./blockchain/config.json');
-  const ain = new Ain(cfg.provider_url);
-  const fs = require('fs');
-  const pk = fs.readFileSync('blockchain/.env','utf-8').match(/AIN_PRIVATE_KEY=(.+)/)[1].trim();
-  ain.wallet.addAndSetDefaultAccount(pk);
-  // ... then call ain.knowledge methods
-"
-```
+    Reading bytes end-to-end also skips the str decode/encode round trip —
+    the templates are only ever written verbatim.
+    """
+    return resources.files("kg_extractor.templates").joinpath(name).read_bytes()
 
-Key ain.knowledge methods:
-- `ain.knowledge.explore(input)` — record an exploration on-chain
-  - input: `{topicPath, title, content, summary, depth, tags}`
-- `ain.knowledge.getExplorers(topicPath)` — list addresses that explored a topic
-- `ain.knowledge.getExplorations(address, topicPath)` — get explorations by user
-- `ain.knowledge.getFrontierMap(topicPrefix)` — per-topic stats (explorer_count, max_depth, avg_depth)
-- `ain.knowledge.getTopicStats(topicPath)` — stats for one topic
-- `ain.knowledge.access(ownerAddr, topicPath, entryId)` — access gated content (x402)
-
-### Setup wallet (first time)
-```bash
-node -e "
-  const Ain = require(require('./blockchain/config.json').ain_js_path).default;
-  const cfg = require('./blockchain/config.json');
-  const ain = new Ain(cfg.provider_url);
-  const crypto = require('crypto'), fs = require('fs');
-  let pk;
-  try { pk = fs.readFileSync('blockchain/.env','utf-8').match(/AIN_PRIVATE_KEY=(.+)/)[1].trim(); }
-  catch(e) { pk = crypto.randomBytes(32).toString('hex'); fs.writeFileSync('blockchain/.env','AIN_PRIVATE_KEY='+pk+'\\n'); }
-  const addr = ain.wallet.addAndSetDefaultAccount(pk);
-  const profile = JSON.parse(fs.readFileSync('.learner/profile.json','utf-8'));
-  profile.wallet_address = addr;
-  fs.writeFileSync('.learner/profile.json', JSON.stringify(profile,null,2)+'\\n');
-  console.log(JSON.stringify({address: addr, status: 'ready'}));
-"
-```
-
-### Record concept completion
-Look up the concept's topicPath and depth from blockchain/config.json, then:
-```bash
-node -e "
-  const Ain = require(require('./blockchain/config.json').ain_js_path).default;
-  const cfg = require('./blockchain/config.json');
-  const ain = new Ain(cfg.provider_url);
-  const fs = require('fs');
-  const pk = fs.readFileSync('blockchain/.env','utf-8').match(/AIN_PRIVATE_KEY=(.+)/)[1].trim();
-  ain.wallet.addAndSetDefaultAccount(pk);
-  ain.knowledge.explore({
-    topicPath: cfg.topic_map['CONCEPT_ID'],
-    title: 'TITLE',
-    content: 'CONTENT',
-    summary: 'SUMMARY',
-    depth: cfg.depth_map['CONCEPT_ID'] || 1,
-    tags: 'CONCEPT_ID'
-  }).then(r => console.log(JSON.stringify(r)));
-"
-```
-Replace CONCEPT_ID, TITLE, CONTENT, SUMMARY with actual values.
-
-### Get frontier map
-```bash
-node -e "
-  const Ain = require(require('./blockchain/config.json').ain_js_path).default;
-  const cfg = require('./blockchain/config.json');
-  const ain = new Ain(cfg.provider_url);
-  ain.knowledge.getFrontierMap(cfg.topic_prefix).then(r => console.log(JSON.stringify(r, null, 2)));
-"
-```
-
-### Get explorers for a concept
-```bash
-node -e "
-  const Ain = require(require('./blockchain/config.json').ain_js_path).default;
-  const cfg = require('./blockchain/config.json');
-  const ain = new Ain(cfg.provider_url);
-  ain.knowledge.getExplorers(cfg.topic_map['CONCEPT_ID']).then(r => console.log(JSON.stringify(r)));
-"
-```
-
-## How the learner talks to you
-The learner just chats — no slash commands. Recognise these intents:
-- "explore" / "show the graph" — render the knowledge graph as a Mermaid diagram,
-  marking completed concepts with a checkmark and current concept with an arrow.
-  Use the frontier-map API to determine which are completed.
-- "status" — show profile, completion stats from frontier-map, and explorers.
-- "learn <concept>" or "teach me <concept>" — deliver the lesson (see teaching
-  style below).
-- "exercise" / "give me a challenge" — present the exercise for the current concept.
-- "done" / "I finished" — record on-chain (see "Record concept completion" above).
-- "friends" / "explorers" — show on-chain explorers via getExplorers API.
-- "next" / "what should I learn next?" — recommend the next concept via
-  prerequisites, graph topology, and what's already explored on-chain.
-- "graph" — show full Mermaid graph of the current course.
-- "frontier" — show on-chain stats per topic via getFrontierMap API.
-- "setup wallet" — run wallet setup (see above).
-
-## Teaching style (important!)
-When teaching a concept:
-1. **Paper-first**: Start with the paper or origin — who wrote it, when, and what
-   problem it solved. If a lesson has a paper_ref field, cite it.
-2. **Short paragraphs**: 2-3 sentences max. Dense walls of text lose people.
-3. **Inline code**: Show small code snippets (< 15 lines) directly in your
-   message using fenced code blocks. NEVER say "open the file" or "look at
-   file X" — the learner is in a CLI chat and cannot open files.
-4. **One vivid analogy**: Include one concrete analogy or mental image to make
-   the concept stick.
-5. **Quiz exercise**: End with a quiz the learner can answer by typing a number
-   or a short sentence — multiple choice, predict-the-output, fill-in-the-blank,
-   or true/false. Never ask the learner to write code (too hard for a chat).
-   Never say "Explore the implementation of …" — that is too vague.
-6. **Fun**: Be encouraging, use light humour, celebrate progress.
-
-## Completing a concept
-When the learner says "done" or finishes a quiz correctly:
-1. Run the "Record concept completion" script above with the concept details.
-2. Confirm to the learner that progress is recorded on-chain.
-3. Use the knowledge graph to recommend the next concept based on prerequisites.
-
-## Friends / Explorers (blockchain-powered)
-Instead of git branches, friends are discovered on-chain:
-- Use `ain.knowledge.getExplorers(topicPath)` to list wallet addresses.
-- Use `ain.knowledge.getExplorations(address, topicPath)` to see what they wrote.
-- Show addresses (or names if known) and their exploration summaries.
-
-## Premium lessons (x402)
-Some lessons have `x402_price` and `x402_gateway` fields in courses.json.
-When the learner reaches a premium lesson:
-1. Tell them the price and ask if they want to proceed.
-2. If yes, use `ain.knowledge.access(ownerAddr, topicPath, entryId)`.
-
-## Graph structure
-- Nodes have: id, name, type, level, description, key_ideas, code_refs, paper_ref
-- Edges have: source, target, relationship (builds_on, requires, optimizes, etc.)
-- Levels: foundational -> intermediate -> advanced -> frontier
-"""
 
 GITIGNORE_TEMPLATE = """\
 # Python
@@ -270,7 +81,7 @@ blockchain/.env
 """
 
 README_TEMPLATE = """\
-# {title}
+# $title
 
 A Claude Code-powered interactive learning path for transformer architectures.
 
@@ -279,7 +90,7 @@ A Claude Code-powered interactive learning path for transformer architectures.
 1. Clone this repo
 2. Open Claude Code in this directory:
    ```
-   cd {dirname}/
+   cd $dirname/
    claude
    ```
 3. Start learning — just chat naturally:
@@ -310,16 +121,16 @@ A Claude Code-powered interactive learning path for transformer architectures.
 
 ## Course Structure
 
-{course_list}
+$course_list
 
 ## Stats
 
-- {num_concepts} concepts across {num_courses} courses
-- {num_foundational} foundational, {num_intermediate} intermediate, {num_advanced} advanced, {num_frontier} frontier concepts
+- $num_concepts concepts across $num_courses courses
+- $num_foundational foundational, $num_intermediate intermediate, $num_advanced advanced, $num_frontier frontier concepts
 """
 
 README_BLOCKCHAIN_TEMPLATE = """\
-# {title}
+# $title
 
 A Claude Code-powered interactive learning path for transformer architectures,
 with on-chain progress tracking via the AIN blockchain.
@@ -334,7 +145,7 @@ with on-chain progress tracking via the AIN blockchain.
 1. Clone this repo
 2. Open Claude Code in this directory:
    ```
-   cd {dirname}/
+   cd $dirname/
    claude
    ```
 3. Set up your blockchain wallet (first time only):
@@ -375,20 +186,85 @@ frontier                # community stats per topic
 
 ## Course Structure
 
-{course_list}
+$course_list
 
 ## Stats
 
-- {num_concepts} concepts across {num_courses} courses
-- {num_foundational} foundational, {num_intermediate} intermediate, {num_advanced} advanced, {num_frontier} frontier concepts
+- $num_concepts concepts across $num_courses courses
+- $num_foundational foundational, $num_intermediate intermediate, $num_advanced advanced, $num_frontier frontier concepts
 """
 
+# Compiled once at import: string.Template splits the template into literal
+# and placeholder segments up front, so repeated scaffolds skip the format
+# parsing of the multi-KB README text.
+_README_TMPL = string.Template(README_TEMPLATE)
+_README_BLOCKCHAIN_TMPL = string.Template(README_BLOCKCHAIN_TEMPLATE)
+
+# Verbatim templates are encoded once at import; each scaffold is then a
+# raw write_bytes with no TextIOWrapper or per-write encode step.
+_GITIGNORE_BYTES = GITIGNORE_TEMPLATE.encode("utf-8")
+_GITIGNORE_BLOCKCHAIN_BYTES = (GITIGNORE_TEMPLATE + GITIGNORE_BLOCKCHAIN_EXTRA).encode("utf-8")
+
 
 # ---------------------------------------------------------------------------
 # Scaffolder
 # ---------------------------------------------------------------------------
 
 
+def _link_or_copy(source: Path, dest: Path) -> None:
+    """Clone, link, or copy source to dest — cheapest mechanism first.
+
+    On reflink-capable filesystems (btrfs/XFS) the FICLONE ioctl gives
+    copy-on-write copy semantics without duplicating data; elsewhere a
+    hard link is metadata-only for our read-only snippets; anything else
+    (EXDEV, unsupported ioctl) falls back to a real copy2.
+    """
+    dest.unlink(missing_ok=True)
+    if _FICLONE is not None:
+        try:
+            with open(source, "rb") as src, open(dest, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(source, dest)
+            return
+        except OSError:
+            dest.unlink(missing_ok=True)
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copy2(source, dest)
+
+
+@functools.lru_cache(maxsize=1)
+def _resolve_ain_js_path() -> Path:
+    """Locate the local ain-js library, probing candidates once per process.
+
+    The result is deterministic for the process lifetime, so batch scaffolds
+    skip the repeated Path.exists() stats after the first call.
+    """
+    ain_js_lib = Path(__file__).resolve().parent.parent / "ain-js" / "lib" / "ain.js"
+    if not ain_js_lib.exists():
+        for candidate in [
+            Path.home() / "git" / "ain-js" / "lib" / "ain.js",
+            Path("/home/comcom/git/ain-js/lib/ain.js"),
+        ]:
+            if candidate.exists():
+                ain_js_lib = candidate
+                break
+    return ain_js_lib
+
+
+@dataclass(slots=True)
+class _GraphData:
+    """Everything the writers need from the graph, gathered in one pass."""
+
+    topic_prefix: str
+    topic_map: dict[str, str]
+    depth_map: dict[str, int]
+    topics_to_register: list[dict]
+    code_refs: set[str]
+    level_counts: Counter
+
+
 class Scaffolder:
     """Generates the course repo that students clone and use with Claude Code."""
 
@@ -402,6 +278,12 @@ class Scaffolder:
         self.courses = courses
         self.enable_blockchain = enable_blockchain
 
+    @functools.cached_property
+    def _first_concept(self) -> str:
+        """First concept in topological order, computed on first use."""
+        sorted_concepts = self.kg.topological_sort()
+        return sorted_concepts[0] if sorted_concepts else ""
+
     def scaffold(self, output_dir: str | Path, repo_path: Optional[str | Path] = None) -> Path:
         """Generate the complete course repo.
 
@@ -410,33 +292,127 @@ class Scaffolder:
             repo_path: optional path to the source HF transformers repo for copying code snippets
         """
         output = Path(output_dir)
-        output.mkdir(parents=True, exist_ok=True)
 
-        logger.info("Scaffolding course repo at %s", output)
+        # Create the whole output tree up front (makedirs covers the
+        # parents), so the writers can assume their directories exist
+        # instead of each issuing its own mkdir.
+        subdirs = ["knowledge", ".learner"]
+        if self.enable_blockchain:
+            subdirs.append("blockchain")
+        if repo_path:
+            subdirs.append("src")
+        for sub in subdirs:
+            os.makedirs(output / sub, exist_ok=True)
 
-        self._write_claude_md(output)
-        self._write_knowledge(output)
-        self._write_learner_template(output)
-        self._write_gitignore(output)
-        self._write_readme(output)
+        logger.info("Scaffolding course repo at %s", output)
 
-        if self.enable_blockchain:
-            self._write_blockchain(output)
+        # One traversal feeds the blockchain config and the snippet copy
+        # instead of each writer walking the full node list on its own.
+        data = self._collect_graph_data()
+
+        # The top-level outputs are independent I/O-bound writes; run them in
+        # a thread pool (the GIL is released during the actual file writes).
+        writers = [
+            self._write_claude_md,
+            self._write_knowledge,
+            self._write_learner_template,
+            self._write_gitignore,
+        ]
+        with ThreadPoolExecutor(max_workers=len(writers) + 2) as executor:
+            futures = [executor.submit(writer, output) for writer in writers]
+            futures.append(executor.submit(self._write_readme, output, data))
+            if self.enable_blockchain:
+                futures.append(executor.submit(self._write_blockchain, output, data))
+            for future in futures:
+                future.result()
 
         if repo_path:
-            self._copy_code_snippets(output, Path(repo_path))
+            self._copy_code_snippets(output, Path(repo_path), data)
 
         logger.info("Course repo scaffolded at %s", output)
         return output
 
+    def _collect_graph_data(self) -> _GraphData:
+        """Single pass over the graph collecting what every writer needs.
+
+        The topic/depth maps, the snippet code_refs, and the per-level
+        counts each used to require their own full traversal; fusing them
+        touches the node list once per scaffold.
+        """
+        # Derive a course-level prefix from the first course id, or default
+        course_id = self.courses[0].id if self.courses else "transformers"
+        topic_prefix = f"transformers/{course_id}"
+
+        topic_map: dict[str, str] = {}
+        depth_map: dict[str, int] = {}
+        code_refs: set[str] = set()
+        level_counts: Counter = Counter()
+
+        # Register the root topic
+        topics_to_register: list[dict] = [
+            {
+                "path": "transformers",
+                "title": "Transformers",
+                "description": "Transformer architecture learning topics",
+            },
+            {
+                "path": topic_prefix,
+                "title": course_id.replace("_", " ").title(),
+                "description": f"Topics for {course_id} course",
+            },
+        ]
+
+        # Bind the loop's global/method lookups once; each saves a
+        # LOAD_GLOBAL or LOAD_ATTR per node in the hot traversal.
+        # Plain str concat on a precomputed "prefix/" also beats per-node
+        # f-string FORMAT_VALUE/BUILD_STRING machinery.
+        _prefix_sl = topic_prefix + "/"
+        _depth_get = CONCEPT_LEVEL_DEPTH.get
+        _topics_append = topics_to_register.append
+        _refs_update = code_refs.update
+
+        for cid, name, level, description, refs in self.kg.iter_concept_fields(
+            "id", "name", "level", "description", "code_refs"
+        ):
+            level_counts[level] += 1
+
+            topic_path = _prefix_sl + cid
+            topic_map[cid] = topic_path
+
+            # Depth from level
+            depth_map[cid] = _depth_get(level, 1)
+
+            # No dedup set needed: the graph keys nodes by id, so each
+            # topic_path is unique by construction.
+            _topics_append({
+                "path": topic_path,
+                "title": name,
+                # Slice only when actually truncating — the common short
+                # description skips the slice call entirely.
+                "description": description[:200] if len(description) > 200 else description,
+            })
+
+            # Parse "src/transformers/models/bert/modeling_bert.py:BertSelfAttention";
+            # partition scans once and yields the prefix whether or not a
+            # ":<symbol>" suffix is present, versus the `in` + split pair.
+            _refs_update(ref.partition(":")[0] for ref in refs)
+
+        return _GraphData(
+            topic_prefix=topic_prefix,
+            topic_map=topic_map,
+            depth_map=depth_map,
+            topics_to_register=topics_to_register,
+            code_refs=code_refs,
+            level_counts=level_counts,
+        )
+
     def _write_claude_md(self, output: Path) -> None:
-        template = CLAUDE_MD_BLOCKCHAIN_TEMPLATE if self.enable_blockchain else CLAUDE_MD_TEMPLATE
-        (output / "CLAUDE.md").write_text(template)
+        name = "claude_md_blockchain.md" if self.enable_blockchain else "claude_md.md"
+        (output / "CLAUDE.md").write_bytes(_template_bytes(name))
         logger.info("Wrote CLAUDE.md")
 
     def _write_knowledge(self, output: Path) -> None:
         knowledge_dir = output / "knowledge"
-        knowledge_dir.mkdir(exist_ok=True)
 
         # Write graph
         self.kg.save(knowledge_dir / "graph.json")
@@ -444,20 +420,19 @@ class Scaffolder:
 
         # Write courses
         courses_data = [c.to_dict() for c in self.courses]
-        (knowledge_dir / "courses.json").write_text(
-            json.dumps(courses_data, indent=2, ensure_ascii=False) + "\n"
-        )
+        dump_json(knowledge_dir / "courses.json", courses_data)
         logger.info("Wrote knowledge/courses.json")
 
     def _write_learner_template(self, output: Path) -> None:
         learner_dir = output / ".learner"
-        learner_dir.mkdir(exist_ok=True)
+
+        today = date.today().isoformat()
 
         # Template profile
         profile = LearnerProfile(
             name="Your Name",
             avatar="\U0001f9d1\u200d\U0001f4bb",  # 🧑‍💻
-            started_at=date.today().isoformat(),
+            started_at=today,
             git_user="auto-detected",
         )
         profile.save(learner_dir / "profile.json")
@@ -465,134 +440,82 @@ class Scaffolder:
         if not self.enable_blockchain:
             # Only write progress.json when NOT using blockchain
             # (blockchain mode uses on-chain state as source of truth)
-            sorted_concepts = self.kg.topological_sort()
-            first_concept = sorted_concepts[0] if sorted_concepts else ""
-
             progress = LearnerProgress(
-                current_concept=first_concept,
+                current_concept=self._first_concept,
                 completed=[],
                 in_progress=[],
-                started_at=date.today().isoformat(),
-                last_active=date.today().isoformat(),
+                started_at=today,
+                last_active=today,
             )
             progress.save(learner_dir / "progress.json")
 
         logger.info("Wrote .learner/ template")
 
     def _write_gitignore(self, output: Path) -> None:
-        content = GITIGNORE_TEMPLATE
-        if self.enable_blockchain:
-            content += GITIGNORE_BLOCKCHAIN_EXTRA
-        (output / ".gitignore").write_text(content)
-
-    def _write_readme(self, output: Path) -> None:
-        stats = self.kg.stats()
-        course_list = "\n".join(
+        content = _GITIGNORE_BLOCKCHAIN_BYTES if self.enable_blockchain else _GITIGNORE_BYTES
+        (output / ".gitignore").write_bytes(content)
+
+    def _write_readme(self, output: Path, data: _GraphData) -> None:
+        # Level counts come out of the fused graph traversal rather than
+        # a separate kg.stats() pass.
+        counts = data.level_counts
+        active = [c for c in self.courses if c.concepts]
+        course_list = "\n".join([
             f"- **{c.title}** ({len(c.concepts)} concepts): {c.description}"
-            for c in self.courses if c.concepts
-        )
+            for c in active
+        ])
 
-        template = README_BLOCKCHAIN_TEMPLATE if self.enable_blockchain else README_TEMPLATE
-        readme = template.format(
+        template = _README_BLOCKCHAIN_TMPL if self.enable_blockchain else _README_TMPL
+        readme = template.substitute(
             title="Transformer Learning Path",
             dirname=output.name,
             course_list=course_list or "No courses generated yet.",
-            num_concepts=stats["num_concepts"],
-            num_courses=len([c for c in self.courses if c.concepts]),
-            num_foundational=stats["num_foundational"],
-            num_intermediate=stats["num_intermediate"],
-            num_advanced=stats["num_advanced"],
-            num_frontier=stats["num_frontier"],
+            num_concepts=counts.total(),
+            num_courses=len(active),
+            num_foundational=counts[ConceptLevel.FOUNDATIONAL],
+            num_intermediate=counts[ConceptLevel.INTERMEDIATE],
+            num_advanced=counts[ConceptLevel.ADVANCED],
+            num_frontier=counts[ConceptLevel.FRONTIER],
         )
-        (output / "README.md").write_text(readme)
+        (output / "README.md").write_bytes(readme.encode("utf-8"))
         logger.info("Wrote README.md")
 
     # -----------------------------------------------------------------------
     # Blockchain scaffold
     # -----------------------------------------------------------------------
 
-    def _write_blockchain(self, output: Path) -> None:
+    def _write_blockchain(self, output: Path, data: _GraphData) -> None:
         """Create blockchain/ directory with config.json (topic mappings + ain-js path)."""
         bc_dir = output / "blockchain"
-        bc_dir.mkdir(exist_ok=True)
-
-        # Resolve the local ain-js lib path
-        ain_js_lib = Path(__file__).resolve().parent.parent / "ain-js" / "lib" / "ain.js"
-        if not ain_js_lib.exists():
-            for candidate in [
-                Path.home() / "git" / "ain-js" / "lib" / "ain.js",
-                Path("/home/comcom/git/ain-js/lib/ain.js"),
-            ]:
-                if candidate.exists():
-                    ain_js_lib = candidate
-                    break
 
         # config.json — includes ain_js_path so the tutor can require() it
-        config = self._build_blockchain_config()
+        ain_js_lib = _resolve_ain_js_path()
+        config = self._build_blockchain_config(data)
         config["ain_js_path"] = str(ain_js_lib)
-        (bc_dir / "config.json").write_text(
-            json.dumps(config, indent=2, ensure_ascii=False) + "\n"
-        )
+        dump_json(bc_dir / "config.json", config)
 
         logger.info("Wrote blockchain/config.json")
 
-    def _build_blockchain_config(self) -> dict:
-        """Build the blockchain config.json with topic map, depth map, etc."""
-        # Derive a course-level prefix from the first course id, or default
-        course_id = self.courses[0].id if self.courses else "transformers"
-        topic_prefix = f"transformers/{course_id}"
-
-        # Build topic_map: concept_id → full topic path
-        topic_map: dict[str, str] = {}
-        depth_map: dict[str, int] = {}
-        topics_to_register: list[dict] = []
-
-        # Register the root topic
-        topics_to_register.append({
-            "path": "transformers",
-            "title": "Transformers",
-            "description": "Transformer architecture learning topics",
-        })
-        topics_to_register.append({
-            "path": topic_prefix,
-            "title": course_id.replace("_", " ").title(),
-            "description": f"Topics for {course_id} course",
-        })
-
-        seen_topics: set[str] = set()
-
-        for node in self.kg.get_all_concepts():
-            topic_path = f"{topic_prefix}/{node.id}"
-            topic_map[node.id] = topic_path
-
-            # Depth from level
-            depth_map[node.id] = CONCEPT_LEVEL_DEPTH.get(node.level, 1)
-
-            if topic_path not in seen_topics:
-                seen_topics.add(topic_path)
-                topics_to_register.append({
-                    "path": topic_path,
-                    "title": node.name,
-                    "description": node.description[:200] if node.description else "",
-                })
-
+    def _build_blockchain_config(self, data: _GraphData) -> dict:
+        """Build the blockchain config.json from the pre-collected graph data."""
         # x402 lessons index
-        x402_lessons: dict[str, dict] = {}
-        for course in self.courses:
-            for lesson in course.lessons:
-                if lesson.x402_price:
-                    x402_lessons[lesson.concept_id] = {
-                        "price": lesson.x402_price,
-                        "gateway": lesson.x402_gateway,
-                    }
+        x402_lessons: dict[str, dict] = {
+            lesson.concept_id: {
+                "price": lesson.x402_price,
+                "gateway": lesson.x402_gateway,
+            }
+            for course in self.courses
+            for lesson in course.lessons
+            if lesson.x402_price
+        }
 
         return {
             "provider_url": "http://localhost:8081",
             "chain_id": 0,
-            "topic_prefix": topic_prefix,
-            "topic_map": topic_map,
-            "depth_map": depth_map,
-            "topics_to_register": topics_to_register,
+            "topic_prefix": data.topic_prefix,
+            "topic_map": data.topic_map,
+            "depth_map": data.depth_map,
+            "topics_to_register": data.topics_to_register,
             "x402_lessons": x402_lessons,
         }
 
@@ -600,28 +523,30 @@ class Scaffolder:
     # Code snippets
     # -----------------------------------------------------------------------
 
-    def _copy_code_snippets(self, output: Path, repo_path: Path) -> None:
+    def _copy_code_snippets(self, output: Path, repo_path: Path, data: _GraphData) -> None:
         """Copy relevant code snippets from the source repo."""
         src_dir = output / "src"
-        src_dir.mkdir(exist_ok=True)
 
-        # Collect all code_refs from the graph
-        code_refs = set()
-        for node in self.kg.get_all_concepts():
-            for ref in node.code_refs:
-                # Parse "src/transformers/models/bert/modeling_bert.py:BertSelfAttention"
-                file_part = ref.split(":")[0] if ":" in ref else ref
-                code_refs.add(file_part)
-
-        copied = 0
-        for ref in code_refs:
+        tasks = []
+        for ref in data.code_refs:
             source_file = repo_path / ref
             if source_file.exists() and source_file.is_file():
-                dest = src_dir / Path(ref).name
-                try:
-                    shutil.copy2(source_file, dest)
-                    copied += 1
-                except Exception as e:
-                    logger.debug("Could not copy %s: %s", ref, e)
+                tasks.append((ref, source_file, src_dir / Path(ref).name))
+
+        # Each copy is an independent read/write pair that releases the GIL,
+        # so fan the files out over threads instead of serializing the I/O.
+        copied = 0
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(32, len(tasks))) as executor:
+                futures = {
+                    executor.submit(_link_or_copy, source_file, dest): ref
+                    for ref, source_file, dest in tasks
+                }
+                for future, ref in futures.items():
+                    e = future.exception()
+                    if e is None:
+                        copied += 1
+                    else:
+                        logger.debug("Could not copy %s: %s", ref, e)
 
         logger.info("Copied %d code snippets to src/", copied)
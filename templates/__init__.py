@@ -0,0 +1 @@
+"""Packaged scaffold templates (loaded lazily via importlib.resources)."""